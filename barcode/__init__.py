@@ -34,12 +34,11 @@ __classifiers__ = [
 ]
 
 
+import copy
+import importlib
+from functools import lru_cache
+
 from barcode.errors import BarcodeNotFoundError
-from barcode.codex import Code39, PZN, Code128
-from barcode.ean import EAN8, EAN13, JAN
-from barcode.isxn import ISBN10, ISBN13, ISSN
-from barcode.upc import UPCA
-from barcode.itf import ITF
 
 try:
     _strbase = basestring  # lint:ok
@@ -47,48 +46,80 @@ except NameError:
     _strbase = str
 
 
+# Module and class of every barcode, the modules are imported when a barcode
+# of their kind is first used
 __BARCODE_MAP = dict(
-    ean8=EAN8,
-    ean13=EAN13,
-    ean=EAN13,
-    gtin=EAN13,
-    jan=JAN,
-    upc=UPCA,
-    upca=UPCA,
-    isbn=ISBN13,
-    isbn13=ISBN13,
-    gs1=ISBN13,
-    isbn10=ISBN10,
-    issn=ISSN,
-    code39=Code39,
-    pzn=PZN,
-    code128=Code128,
-    itf=ITF,
+    ean8=('barcode.ean', 'EAN8'),
+    ean13=('barcode.ean', 'EAN13'),
+    ean=('barcode.ean', 'EAN13'),
+    gtin=('barcode.ean', 'EAN13'),
+    jan=('barcode.ean', 'JAN'),
+    upc=('barcode.upc', 'UPCA'),
+    upca=('barcode.upc', 'UPCA'),
+    isbn=('barcode.isxn', 'ISBN13'),
+    isbn13=('barcode.isxn', 'ISBN13'),
+    gs1=('barcode.isxn', 'ISBN13'),
+    isbn10=('barcode.isxn', 'ISBN10'),
+    issn=('barcode.isxn', 'ISSN'),
+    code39=('barcode.codex', 'Code39'),
+    pzn=('barcode.codex', 'PZN'),
+    code128=('barcode.codex', 'Code128'),
+    itf=('barcode.itf', 'ITF'),
 )
 
+# Number of codes whose pattern is kept, see get_encoded
+ENCODING_CACHE_SIZE = 1024
+
+__CLASS_MODULES = {name: module for module, name in __BARCODE_MAP.values()}
+
+
+def __getattr__(name):
+    if name in __CLASS_MODULES:
+        return getattr(importlib.import_module(__CLASS_MODULES[name]), name)
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+
 PROVIDED_BARCODES = list(__BARCODE_MAP.keys())
 PROVIDED_BARCODES.sort()
 
 
 def get(name, code=None, writer=None):
     try:
-        barcode = __BARCODE_MAP[name.lower()]
+        module, class_name = __BARCODE_MAP[name.lower()]
     except KeyError:
         raise BarcodeNotFoundError('The barcode {0!r} you requested is not '
                                    'known.'.format(name))
+    barcode = getattr(importlib.import_module(module), class_name)
     if code is not None:
         return barcode(code, writer)
     else:
         return barcode
 
 
+@lru_cache(maxsize=ENCODING_CACHE_SIZE)
+def _get_built(name, code):
+    barcode = get(name, code)
+    barcode.modules()
+    return barcode
+
+
+def get_encoded(name, code, writer=None):
+    """Like `get(name, code, writer)`, but the checksum and the pattern of a
+    code are only calculated the first time the code is used.
+    """
+    # A copy, the cached barcode is shared and only the writer differs
+    barcode = copy.copy(_get_built(name.lower(), code))
+    barcode.writer = writer or barcode.default_writer()
+    return barcode
+
+
 def get_class(name):
     return get_barcode(name)
 
 
 def generate(name, code, writer=None, output=None, writer_options=None):
     options = writer_options or {}
-    barcode = get_barcode(name, code, writer)
+    barcode = get_encoded(name, code, writer)
     return barcode.render(options)
 
 
@@ -17,6 +17,9 @@ class Barcode(object):
 
     digits = 0
 
+    # Module strings of build(), see modules()
+    _modules = None
+
     default_writer = SVGWriter
 
     default_writer_options = {
@@ -44,6 +47,17 @@ class Barcode(object):
     def build(self):
         raise NotImplementedError
 
+    def modules(self):
+        """Returns the pattern of `build`, which is only built once per
+        barcode.
+
+        :returns: List of strings (only contain 0 or 1).
+        :rtype: List
+        """
+        if self._modules is None:
+            self._modules = tuple(self.build())
+        return list(self._modules)
+
     def get_fullcode(self):
         """Returns the full code, encoded in the barcode.
 
@@ -99,6 +113,6 @@ class Barcode(object):
         if options['write_text']:
             options['text'] = self.get_fullcode()
         self.writer.set_options(options)
-        code = self.build()
+        code = self.modules()
         raw = Barcode.raw = self.writer.render(code)
         return raw
@@ -2,6 +2,8 @@
 
 from __future__ import unicode_literals
 
+import string
+
 
 EDGE = '101'
 MIDDLE = '01010'
@@ -15,3 +17,5 @@ CODES = {
 }
 LEFT_PATTERN = ('AAAAAA', 'AABABB', 'AABBAB', 'AABBBA', 'ABAABB',
                 'ABBAAB', 'ABBBAA', 'ABABAB', 'ABABBA', 'ABBABA')
+# The codes by digit character, so codes are looked up without converting digits
+DIGIT_CODES = dict((name, dict(zip(string.digits, codes))) for name, codes in CODES.items())
@@ -2,6 +2,8 @@
 
 from __future__ import unicode_literals
 
+import string
+
 
 EDGE = '101'
 MIDDLE = '01010'
@@ -11,3 +13,5 @@ CODES = {
     'R': ('1110010', '1100110', '1101100', '1000010', '1011100',
           '1001110', '1010000', '1000100', '1001000', '1110100')
 }
+# The codes by digit character, so codes are looked up without converting digits
+DIGIT_CODES = dict((name, dict(zip(string.digits, codes))) for name, codes in CODES.items())
@@ -238,12 +238,10 @@ class Code128(Barcode):
     def build(self):
         encoded = self._build()
         encoded.append(self._calculate_checksum(encoded))
-        code = ''
-        for code_num in encoded:
-            code += code128.CODES[code_num]
-        code += code128.STOP
-        code += '11'
-        return [code]
+        code = [code128.CODES[code_num] for code_num in encoded]
+        code.append(code128.STOP)
+        code.append('11')
+        return [''.join(code)]
 
     def render(self, writer_options):
         options = dict(module_width=MIN_SIZE, quiet_zone=MIN_QUIET_ZONE)
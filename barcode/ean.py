@@ -11,12 +11,6 @@ from barcode.base import Barcode
 from barcode.charsets import ean as _ean
 from barcode.errors import *
 
-# Python 3
-try:
-    reduce
-except NameError:
-    from functools import reduce
-
 
 # EAN13 Specs (all sizes in mm)
 SIZES = dict(SC0=0.27, SC1=0.297, SC2=0.33, SC3=0.363, SC4=0.396, SC5=0.445,
@@ -70,9 +64,8 @@ class EuropeanArticleNumber13(Barcode):
         :returns: The checksum for `self.ean`.
         :rtype: Integer
         """
-        def sum_(x, y): return int(x) + int(y)
-        evensum = reduce(sum_, self.ean[::2])
-        oddsum = reduce(sum_, self.ean[1::2])
+        evensum = sum(map(int, self.ean[::2]))
+        oddsum = sum(map(int, self.ean[1::2]))
         return (10 - ((evensum + oddsum * 3) % 10)) % 10
 
     def build(self):
@@ -81,15 +74,14 @@ class EuropeanArticleNumber13(Barcode):
         :returns: The pattern as string
         :rtype: String
         """
-        code = _ean.EDGE[:]
+        codes = _ean.DIGIT_CODES
         pattern = _ean.LEFT_PATTERN[int(self.ean[0])]
-        for i, number in enumerate(self.ean[1:7]):
-            code += _ean.CODES[pattern[i]][int(number)]
-        code += _ean.MIDDLE
-        for number in self.ean[7:]:
-            code += _ean.CODES['C'][int(number)]
-        code += _ean.EDGE
-        return [code]
+        code = [_ean.EDGE]
+        code.extend([codes[charset][number] for charset, number in zip(pattern, self.ean[1:7])])
+        code.append(_ean.MIDDLE)
+        code.extend([codes['C'][number] for number in self.ean[7:]])
+        code.append(_ean.EDGE)
+        return [''.join(code)]
 
     def to_ascii(self):
         """Returns an ascii representation of the barcode.
@@ -151,9 +143,8 @@ class EuropeanArticleNumber8(EuropeanArticleNumber13):
         :returns: The checksum for `self.ean`.
         :rtype: Integer
         """
-        def sum_(x, y): return int(x) + int(y)
-        evensum = reduce(sum_, self.ean[::2])
-        oddsum = reduce(sum_, self.ean[1::2])
+        evensum = sum(map(int, self.ean[::2]))
+        oddsum = sum(map(int, self.ean[1::2]))
         return (10 - ((evensum * 3 + oddsum) % 10)) % 10
 
     def build(self):
@@ -162,14 +153,13 @@ class EuropeanArticleNumber8(EuropeanArticleNumber13):
         :returns: The pattern as string
         :rtype: String
         """
-        code = _ean.EDGE[:]
-        for number in self.ean[:4]:
-            code += _ean.CODES['A'][int(number)]
-        code += _ean.MIDDLE
-        for number in self.ean[4:]:
-            code += _ean.CODES['C'][int(number)]
-        code += _ean.EDGE
-        return [code]
+        codes = _ean.DIGIT_CODES
+        code = [_ean.EDGE]
+        code.extend([codes['A'][number] for number in self.ean[:4]])
+        code.append(_ean.MIDDLE)
+        code.extend([codes['C'][number] for number in self.ean[4:]])
+        code.append(_ean.EDGE)
+        return [''.join(code)]
 
 
 # Shortcuts
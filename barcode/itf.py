@@ -8,6 +8,8 @@ from __future__ import unicode_literals
 """
 __docformat__ = 'restructuredtext en'
 
+from functools import lru_cache
+
 from barcode.base import Barcode
 from barcode.charsets import itf
 from barcode.errors import *
@@ -15,6 +17,25 @@ from barcode.errors import *
 MIN_SIZE = 0.2
 MIN_QUIET_ZONE = 6.4
 
+
+@lru_cache(maxsize=None)
+def _module_table(narrow, wide):
+    """Returns the modules of the start pattern, of every pair of digits
+    and of the stop pattern for the given element widths.
+    """
+    widths = dict(W='1' * wide, w='0' * wide, N='1' * narrow, n='0' * narrow)
+
+    def expand(elements):
+        return ''.join([widths[e] for e in elements])
+
+    pairs = {}
+    for bars_digit in range(10):
+        for spaces_digit in range(10):
+            elements = ''.join([bar.upper() + space.lower() for bar, space in
+                                zip(itf.CODES[bars_digit], itf.CODES[spaces_digit])])
+            pairs['{0}{1}'.format(bars_digit, spaces_digit)] = expand(elements)
+    return expand(itf.START), pairs, expand(itf.STOP)
+
 class ITF(Barcode):
     """Initializes a new ITF instance.
 
@@ -52,25 +73,11 @@ class ITF(Barcode):
         return self.code
 
     def build(self):
-        data = itf.START
-        for i in range(0, len(self.code), 2):
-            bars_digit = int(self.code[i])
-            spaces_digit = int(self.code[i+1])
-            for j in range(5):
-                data += itf.CODES[bars_digit][j].upper()
-                data += itf.CODES[spaces_digit][j].lower()
-        data += itf.STOP
-        raw = ''
-        for e in data:
-            if e == 'W':
-                raw += '1' * self.wide
-            if e == 'w':
-                raw += '0' * self.wide
-            if e == 'N':
-                raw += '1' * self.narrow
-            if e == 'n':
-                raw += '0' * self.narrow
-        return [raw]
+        start, pairs, stop = _module_table(self.narrow, self.wide)
+        raw = [start]
+        raw.extend([pairs[self.code[i:i + 2]] for i in range(0, len(self.code), 2)])
+        raw.append(stop)
+        return [''.join(raw)]
 
     def render(self, writer_options):
         options = dict(module_width=MIN_SIZE/self.narrow, quiet_zone=MIN_QUIET_ZONE)
@@ -11,7 +11,6 @@ __docformat__ = 'restructuredtext en'
 from barcode.base import Barcode
 from barcode.charsets import upc as _upc
 from barcode.errors import *
-from functools import reduce
 
 class UniversalProductCodeA(Barcode):
     """Initializes new UPC-A barcode.
@@ -60,10 +59,9 @@ class UniversalProductCodeA(Barcode):
         :return: The checksum for 'self.upc'
         :rtype: Integer
         """
-        def sum_(x, y): return int(x) + int(y)
         upc = self.upc[0:self.digits]
-        oddsum = reduce(sum_, upc[::2])
-        evensum = reduce(sum_, upc[1::2])
+        oddsum = sum(map(int, upc[::2]))
+        evensum = sum(map(int, upc[1::2]))
         check = (evensum + oddsum * 3) % 10
         if check == 0:
             return 0
@@ -77,19 +75,14 @@ class UniversalProductCodeA(Barcode):
         :return: The pattern as string
         :rtype: String
         """
-        code = _upc.EDGE[:]
-
-        for i, number in enumerate(self.upc[0:6]):
-            code += _upc.CODES['L'][int(number)]
-
-        code += _upc.MIDDLE
-
-        for number in self.upc[6:]:
-            code += _upc.CODES['R'][int(number)]
-
-        code += _upc.EDGE
-
-        return [code]
+        codes = _upc.DIGIT_CODES
+        code = [_upc.EDGE]
+        code.extend([codes['L'][number] for number in self.upc[0:6]])
+        code.append(_upc.MIDDLE)
+        code.extend([codes['R'][number] for number in self.upc[6:]])
+        code.append(_upc.EDGE)
+
+        return [''.join(code)]
 
     def to_ascii(self):
         """Returns an ascii representation of the barcode.
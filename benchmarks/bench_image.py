@@ -0,0 +1,115 @@
+"""
+Compares the bulk thresholding in `printables.image.Image.render` against the
+per-pixel loop it replaced, on the test image and on generated images in the
+formats Qt commonly loads, and times every dithering method on label high
+images of increasing width.
+
+Usage:
+    python -m benchmarks.bench_image
+"""
+import os.path as path
+import random
+import tempfile
+import timeit
+
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QColor, QPainter
+
+import dither
+from labelmaker import USABLE_HEIGHT
+from printables.image import Image, ImageData
+from raster import image_to_array
+
+TESTDATA = path.join(path.dirname(__file__), '..', 'testdata')
+THRESHOLDS = [1, 64, 127, 200, 254]
+WIDTHS = [100, 1000, 5000]
+FORMATS = [
+    QImage.Format.Format_RGB32,
+    QImage.Format.Format_ARGB32,
+    QImage.Format.Format_Grayscale8,
+    QImage.Format.Format_Indexed8,
+]
+
+
+def render_per_pixel(image: Image) -> QImage:
+    """ The original Image.render thresholding loop, kept as reference """
+    d = image.data
+    img_src = QImage(d.source)
+    if img_src.hasAlphaChannel():
+        img = QImage(img_src.size(), QImage.Format.Format_ARGB32)
+        img.fill(0xffffffff)
+        p = QPainter(img)
+        p.drawImage(0, 0, img_src)
+        p.end()
+    else:
+        img = img_src
+    img = img.scaledToHeight(USABLE_HEIGHT, Qt.TransformationMode.FastTransformation)
+    rect = img.rect()
+
+    max_x = img.width()
+    max_y = USABLE_HEIGHT
+
+    bitmap = QImage(rect.width(), USABLE_HEIGHT, QImage.Format.Format_Mono)
+    for x in range(0, rect.width()):
+        for y in range(0, USABLE_HEIGHT):
+            if x >= max_x or x <= 0 or y > max_y or y < 0:
+                bitmap.setPixel(x, y, 1)
+                continue
+
+            oc = img.pixelColor(x, y)
+            if oc.value() > d.threshold:
+                bitmap.setPixel(x, y, 1)
+            else:
+                bitmap.setPixel(x, y, 0)
+    return bitmap
+
+
+def make_image(file_name: str, image_format: QImage.Format, seed: int = 0):
+    rng = random.Random(seed)
+    image = QImage(200, 150, QImage.Format.Format_ARGB32)
+    for x in range(image.width()):
+        for y in range(image.height()):
+            image.setPixelColor(x, y, QColor(rng.randrange(256), rng.randrange(256), rng.randrange(256),
+                                             rng.randrange(256)))
+    image.convertToFormat(image_format).save(file_name)
+
+
+def same(a: QImage, b: QImage) -> bool:
+    return a.size() == b.size() and (image_to_array(a) == image_to_array(b)).all()
+
+
+def main():
+    sources = [path.join(TESTDATA, 'whodat3.png')]
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, image_format in enumerate(FORMATS):
+            file_name = path.join(tmp, f'{image_format.name}.png')
+            make_image(file_name, image_format, i)
+            sources.append(file_name)
+
+        for source in sources:
+            for threshold in THRESHOLDS:
+                image = Image(ImageData(source, threshold))
+                assert same(image.render(), render_per_pixel(image)), f'Output mismatch: {source} {threshold}'
+
+        image = Image(ImageData(sources[0]))
+        number = 5
+        slow = timeit.timeit(lambda: render_per_pixel(image), number=number) / number
+        fast = timeit.timeit(lambda: image.render(), number=number * 10) / (number * 10)
+        print(f'{"width":>8} {"per-pixel":>12} {"bulk":>12} {"speed-up":>10}')
+        print(f'{image.render().width():>8} {slow * 1000:>10.2f}ms {fast * 1000:>10.3f}ms {slow / fast:>9.0f}x')
+
+    print()
+    print(f'{"method":<20}' + ''.join(f'{width:>12}' for width in WIDTHS))
+    rng = np.random.default_rng(0)
+    for key, (name, method) in dither.METHODS.items():
+        times = []
+        for width in WIDTHS:
+            values = rng.integers(0, 256, (USABLE_HEIGHT, width)).astype(np.uint8)
+            number = max(1, 1000 // width)
+            times.append(timeit.timeit(lambda: method(values, 127), number=number) / number)
+        print(f'{name:<20}' + ''.join(f'{t * 1000:>10.2f}ms' for t in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares the bulk PackBits line encoder in `labelmaker.compression` against
+encoding every raster line with the `packbits` module, on real label rasters,
+and shows how many bytes zero raster lines save on sparse labels.
+
+Usage:
+    python -m benchmarks.bench_packbits
+"""
+import os.path as path
+import timeit
+
+import packbits
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QPainter
+
+from labelmaker import USABLE_HEIGHT, RASTER_LINE_SIZE
+from labelmaker import compression
+from labelmaker.encode import encode_raster_transfer, decode_raster_transfer
+from raster import pack_print_image
+
+TESTDATA = path.join(path.dirname(__file__), '..', 'testdata')
+REPEATS = [1, 10, 50]
+SPACINGS = [0, 100, 1000]
+
+
+def encode_per_line(data) -> bytes:
+    return b''.join(packbits.encode(bytes(data[i: i + RASTER_LINE_SIZE]))
+                    for i in range(0, len(data), RASTER_LINE_SIZE))
+
+
+def load_label(file_name: str, repeat: int, spacing: int = 0) -> bytearray:
+    """ Build a label raster with `repeat` copies of an image, `spacing` pixels apart """
+    source = QImage(path.join(TESTDATA, file_name)).scaledToHeight(USABLE_HEIGHT)
+    source = source.convertToFormat(QImage.Format.Format_Mono, Qt.ImageConversionFlag.ThresholdDither)
+    step = source.width() + spacing
+    image = QImage(step * repeat, USABLE_HEIGHT, QImage.Format.Format_Mono)
+    image.fill(0xffffffff)
+    with QPainter(image) as p:
+        for i in range(repeat):
+            p.drawImage(i * step, 0, source)
+    return pack_print_image(image)
+
+
+def main():
+    print(f'{"lines":>8} {"per-line":>12} {"bulk":>12} {"speed-up":>10} {"decode":>12}')
+    for repeat in REPEATS:
+        data = load_label('whodat3.png', repeat)
+        encoded = encode_raster_transfer(data)
+        assert decode_raster_transfer(encoded) == data, 'Round trip mismatch'
+        assert decode_raster_transfer(encode_raster_transfer(data, zero_lines=False)) == data, 'Round trip mismatch'
+        assert bytes(compression.encode_lines(data, RASTER_LINE_SIZE)[0]) == encode_per_line(data), 'Output mismatch'
+
+        number = max(1, 50 // repeat)
+        slow = timeit.timeit(lambda: encode_per_line(data), number=number) / number
+        fast = timeit.timeit(lambda: encode_raster_transfer(data, zero_lines=False), number=number) / number
+        decode = timeit.timeit(lambda: decode_raster_transfer(encoded), number=number) / number
+        lines = len(data) // RASTER_LINE_SIZE
+        print(f'{lines:>8} {slow * 1000:>10.2f}ms {fast * 1000:>10.2f}ms {slow / fast:>9.1f}x {decode * 1000:>10.2f}ms')
+
+    print()
+    print(f'{"spacing":>8} {"G frames":>10} {"with Z":>10} {"saved":>8}')
+    for spacing in SPACINGS:
+        data = load_label('whodat3.png', 3, spacing)
+        plain = len(encode_raster_transfer(data, zero_lines=False))
+        zeroed = len(encode_raster_transfer(data))
+        print(f'{spacing:>8} {plain:>9}B {zeroed:>9}B {1 - zeroed / plain:>7.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares the bulk raster packing in `raster.pack_print_image` against the
+per-pixel loop it replaced in `PrintThread.run`.
+
+Usage:
+    python -m benchmarks.bench_raster
+"""
+import random
+import timeit
+
+from PyQt6.QtGui import QImage
+
+from labelmaker import BUFFER_HEIGHT, PRINT_MARGIN, USABLE_HEIGHT
+from raster import pack_print_image
+
+WIDTHS = [10, 100, 1000, 5000]
+
+
+def pack_print_image_per_pixel(image: QImage) -> bytearray:
+    """ The original PrintThread bit packing loop, kept as reference """
+    buf = bytearray()
+    bit_cursor = 8
+    byte = 0
+    for x in range(0, image.width()):
+        for y in range(0, BUFFER_HEIGHT):
+            if y < PRINT_MARGIN or y >= (BUFFER_HEIGHT - PRINT_MARGIN):
+                pixel = 0xffffffff
+            else:
+                pixel = image.pixel(x, y - PRINT_MARGIN)
+
+            bit_cursor -= 1
+            if pixel <= 0xff000000:
+                byte |= (1 << bit_cursor)
+
+            if bit_cursor == 0:
+                buf.append(byte)
+                byte = 0
+                bit_cursor = 8
+    return buf
+
+
+def make_label_image(width: int, seed: int = 0) -> QImage:
+    rng = random.Random(seed)
+    image = QImage(width, USABLE_HEIGHT, QImage.Format.Format_Mono)
+    image.fill(0xffffffff)
+    for x in range(width):
+        for y in range(USABLE_HEIGHT):
+            if rng.random() < 0.3:
+                image.setPixel(x, y, 0)
+    return image
+
+
+def main():
+    print(f'{"width":>8} {"per-pixel":>12} {"bulk":>12} {"speed-up":>10}')
+    for width in WIDTHS:
+        image = make_label_image(width)
+        assert pack_print_image(image) == pack_print_image_per_pixel(image), f'Output mismatch at width {width}'
+
+        number = max(1, 1000 // width)
+        slow = timeit.timeit(lambda: pack_print_image_per_pixel(image), number=number) / number
+        fast = timeit.timeit(lambda: pack_print_image(image), number=number * 10) / (number * 10)
+        print(f'{width:>8} {slow * 1000:>10.2f}ms {fast * 1000:>10.3f}ms {slow / fast:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures what the print command imports, using `python -X importtime`, and
+guards the CLI startup: the widgets of the editor, qasync, asyncio, yaml and
+the device backends must not be imported when printing to a file.
+
+Prints the median total import time over a few runs with the modules that
+took longest, and exits with status 1 if a forbidden module is imported or
+the total exceeds the budget.
+
+Usage:
+    python -m benchmarks.bench_startup [--budget 500] [--repeat 5] [--top 15]
+"""
+import argparse
+import os
+import os.path as path
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+ROOT = path.join(path.dirname(__file__), '..')
+TESTDATA = path.join(ROOT, 'testdata')
+
+# A label with every printable type
+LABEL = ['label', '-t', 'Label 123', '-s', '10', '-b', '123456789012:ean13', '-q', 'https://example.com',
+         '-i', path.join(TESTDATA, 'whodat3.png') + ':127']
+
+# Modules that the print command must not import, by package
+FORBIDDEN = ['gui', 'qasync', 'asyncio', 'yaml', 'serial', 'bluetooth', 'multiprocessing', 'labelmaker.aio',
+             'labelmaker.emulator']
+
+# Total import time in milliseconds
+BUDGET = 500
+
+
+def import_times(output: str) -> Tuple[float, Dict[str, float]]:
+    """ Run the print command, returning the total import time and the self time of every module in milliseconds """
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, '-X', 'importtime', 'pytouch3.py', 'print', '--output', output] + LABEL,
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'Print command failed:\n{result.stderr}')
+
+    total = 0.0
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us) / 1000
+        # Top level imports are not indented, their cumulative times add up to the total
+        if not name.startswith('  ', 1):
+            total += int(cumulative_us) / 1000
+    return total, modules
+
+
+def forbidden(modules: List[str]) -> List[str]:
+    """ The forbidden packages that any of `modules` belongs to """
+    return [f for f in FORBIDDEN if any(name == f or name.startswith(f + '.') for name in modules)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=BUDGET, help='maximum total import time in milliseconds')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='number of slowest modules to list')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = path.join(tmp, 'label.png')
+        runs = [import_times(output) for _ in range(args.repeat)]
+
+    total = statistics.median(t for t, _ in runs)
+    modules = runs[-1][1]
+    print(f'{"module":<40} {"self":>10}')
+    for name, ms in sorted(modules.items(), key=lambda it: -it[1])[:args.top]:
+        print(f'{name:<40} {ms:>8.2f}ms')
+    print()
+    print(f'{len(modules)} modules, {total:.1f}ms total import time (median of {args.repeat}), budget {args.budget:.0f}ms')
+
+    ok = True
+    bad = forbidden(list(modules))
+    if len(bad) > 0:
+        print(f'Forbidden modules imported: {", ".join(bad)}')
+        ok = False
+    if total > args.budget:
+        print(f'Import time over budget')
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
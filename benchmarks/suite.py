@@ -0,0 +1,273 @@
+"""
+Benchmarks every stage of the print pipeline on labels of increasing width:
+rendering each printable type, updating the preview, composing the label
+headless from scratch, packing the bit map, encoding the raster transfer and
+sending the whole job to the printer emulator.
+
+Results can be written as JSON and compared against an earlier run, in which
+case the exit status is 1 if any benchmark got slower than the threshold.
+
+Usage:
+    python -m benchmarks.suite [--output results.json] [--baseline baseline.json]
+                               [--threshold 1.25] [--filter encode]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import os.path as path
+import platform
+import statistics
+import sys
+import timeit
+from functools import cached_property
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+from PyQt6.QtGui import QImage
+from PyQt6.QtWidgets import QApplication
+
+from composer import LabelComposer
+from gui.editor_window import EditorWindow
+from labelmaker import LabelMaker
+from labelmaker.emulator import EmulatedPrinterDevice, BITS_PER_BYTE
+from labelmaker.encode import encode_raster_transfer
+from printables.barcode import Barcode, BarcodeData
+from printables.image import Image, ImageData
+from printables.printable import Printable
+from printables.qrcode import QrCode, QrCodeData
+from printables.spacing import Spacing, SpacingData
+from printables.text import Text, TextData
+from raster import pack_print_image
+import text_layout
+
+TESTDATA = path.join(path.dirname(__file__), '..', 'testdata')
+WIDTHS = [10, 100, 1000, 5000]
+REPEAT = 5
+# Smallest total time of a single measurement, see timeit.Timer.autorange
+MIN_TIME = 0.2
+THRESHOLD = 1.25
+
+PRINTABLES: Dict[str, Callable[[], Printable]] = {
+    'Text': lambda: Text(TextData('Label 123')),
+    'Barcode': lambda: Barcode(BarcodeData(None, '123456789012', 'ean13')),
+    'QrCode': lambda: QrCode(QrCodeData('https://github.com/piksel/pytouch-cube')),
+    'Image': lambda: Image(ImageData(path.join(TESTDATA, 'whodat3.png'))),
+    'Spacing': lambda: Spacing(SpacingData(10)),
+}
+
+# Caches to clear before every render of a printable type, so render measures rendering and not a cache hit
+RENDER_CACHES: Dict[str, Callable[[], None]] = {
+    'Text': text_layout.clear_caches,
+}
+
+# Printables that make up the mixed labels, in order
+MIXED = ['Text', 'Barcode', 'QrCode', 'Image']
+
+
+class Benchmark:
+    def __init__(self, name: str, fun: Callable, **info):
+        self.name = name
+        self.fun = fun
+        self.info = info
+
+    def run(self, repeat: int) -> dict:
+        timer = timeit.Timer(self.fun)
+        number = 1
+        while timer.timeit(number) < MIN_TIME and number < 1 << 20:
+            number *= 2
+        times = [t / number for t in timer.repeat(repeat, number)]
+        return dict(min=min(times), median=statistics.median(times), number=number, **self.info)
+
+
+def mixed_items(width: int) -> List[Printable]:
+    """ Mixed printables, added until the label is at least `width` columns wide
+
+    Labels narrower than a single printable consist of spacing only.
+    """
+    first = PRINTABLES[MIXED[0]]()
+    if first.render().width() >= width:
+        return [Spacing(SpacingData(width))]
+    items = []
+    composer = LabelComposer()
+    while len(items) == 0 or composer.compose(items).width() < width:
+        items.append(PRINTABLES[MIXED[len(items) % len(MIXED)]]())
+    return items
+
+
+def mixed_label(app: QApplication, items: List[Printable]) -> EditorWindow:
+    """ Create an editor with the given printables """
+    editor = EditorWindow(app)
+    for item in items:
+        editor.sources.add_item(item)
+    editor.update_preview()
+    return editor
+
+
+def transmit(device: EmulatedPrinterDevice, data: bytearray):
+    LabelMaker(device).print_label(data)
+
+
+class LabelFixture:
+    """ The label of `width` columns and what the later stages make of it, each created when first used """
+
+    def __init__(self, app: QApplication, width: int):
+        self.app = app
+        self.width = width
+
+    @cached_property
+    def items(self) -> List[Printable]:
+        return mixed_items(self.width)
+
+    @cached_property
+    def print_image(self) -> QImage:
+        return LabelComposer().compose(self.items)
+
+    @cached_property
+    def editor(self) -> EditorWindow:
+        return mixed_label(self.app, self.items)
+
+    @cached_property
+    def image(self) -> QImage:
+        # The remaining stages get exactly `width` columns
+        return QImage(self.print_image).copy(0, 0, self.width, self.print_image.height())
+
+    @cached_property
+    def data(self) -> bytearray:
+        return pack_print_image(self.image)
+
+    @cached_property
+    def device(self) -> EmulatedPrinterDevice:
+        device = EmulatedPrinterDevice()
+        transmit(device, self.data)
+        return device
+
+
+def render_benchmark(name: str, create: Callable[[], Printable]) -> Benchmark:
+    printable = create()
+    clear = RENDER_CACHES.get(name)
+    if clear is None:
+        render = printable.render
+    else:
+        def render():
+            clear()
+            return printable.render()
+    return Benchmark(f'render.{name}', render, columns=printable.render().width())
+
+
+def label_benchmarks(label: LabelFixture) -> Iterator[Tuple[str, Callable[[], Benchmark]]]:
+    width = label.width
+
+    def preview():
+        editor = label.editor
+        return Benchmark(f'preview.{width}', editor.update_preview, columns=editor.print_image.width(),
+                         items=len(label.items))
+
+    def compose():
+        items = label.items
+        return Benchmark(f'compose.{width}', lambda: LabelComposer().compose(items),
+                         columns=label.print_image.width(), items=len(items))
+
+    def pack():
+        image = label.image
+        return Benchmark(f'pack.{width}', lambda: pack_print_image(image), columns=width)
+
+    def encode():
+        data = label.data
+        return Benchmark(f'encode.{width}', lambda: encode_raster_transfer(data), columns=width,
+                         bytes=len(encode_raster_transfer(data)))
+
+    def transmission():
+        device, data = label.device, label.data
+        sent = device.connections[0].bytes_written
+        return Benchmark(f'transmit.{width}', lambda: transmit(device, data), columns=width, bytes=sent,
+                         wire_time=sent * BITS_PER_BYTE / device.baudrate)
+
+    yield f'preview.{width}', preview
+    yield f'compose.{width}', compose
+    yield f'pack.{width}', pack
+    yield f'encode.{width}', encode
+    yield f'transmit.{width}', transmission
+
+
+def collect(app: QApplication) -> Iterator[Tuple[str, Callable[[], Benchmark]]]:
+    """ Yield the name of every benchmark with a function that creates it, so only selected benchmarks are set up """
+    for name, create in PRINTABLES.items():
+        yield f'render.{name}', lambda name=name, create=create: render_benchmark(name, create)
+
+    for width in WIDTHS:
+        yield from label_benchmarks(LabelFixture(app, width))
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> bool:
+    """ Print how every result relates to the baseline and return whether none of them regressed """
+    ok = True
+    print()
+    print(f'{"benchmark":<20} {"baseline":>12} {"current":>12} {"ratio":>8}')
+    for name, result in results.items():
+        if name not in baseline:
+            print(f'{name:<20} {"-":>12} {result["min"] * 1000:>10.3f}ms')
+            continue
+        before = baseline[name]['min']
+        ratio = result['min'] / before
+        regressed = ratio > threshold
+        ok &= not regressed
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{name:<20} {before * 1000:>10.3f}ms {result["min"] * 1000:>10.3f}ms {ratio:>7.2f}x{flag}')
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='slow-down relative to the baseline that counts as a regression')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication([])
+
+    # Barcode rendering and LabelMaker report progress on stdout
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        benchmarks = [create() for name, create in collect(app) if args.filter in name]
+
+    results = {}
+    print(f'{"benchmark":<20} {"min":>12} {"median":>12} {"columns":>8}')
+    for benchmark in benchmarks:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = benchmark.run(args.repeat)
+        results[benchmark.name] = result
+        print(f'{benchmark.name:<20} {result["min"] * 1000:>10.3f}ms {result["median"] * 1000:>10.3f}ms '
+              f'{result.get("columns", ""):>8}')
+
+    if args.output is not None:
+        report = dict(
+            created=datetime.datetime.now().isoformat(timespec='seconds'),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            machine=platform.machine(),
+            numpy=np.__version__,
+            qt=QT_VERSION_STR,
+            pyqt=PYQT_VERSION_STR,
+            results=results,
+        )
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        if not compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
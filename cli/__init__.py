@@ -1,2 +1,9 @@
 from .arguments import get_parser
-from .cli_print import CliPrint
+
+
+def __getattr__(name: str):
+    # Parsing the arguments does not need Qt, CliPrint is only imported when printing
+    if name == 'CliPrint':
+        from .cli_print import CliPrint
+        return CliPrint
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
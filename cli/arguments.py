@@ -29,6 +29,21 @@ def tuple_type_factory(types: List, delimiter: str = ":"):
     return tuple_parser
 
 
+def list_type_factory(item_type, choices: List = None, delimiter: str = ","):
+    def list_parser(text: str) -> Tuple:
+        items = tuple(item_type(item.strip()) for item in text.split(delimiter))
+        if choices is not None:
+            for item in items:
+                assert item in choices, f"{item} is not one of {', '.join(choices)}"
+        return items
+    return list_parser
+
+
+def multiline_text(text: str) -> str:
+    """ Text with a \\n escape for each line break, so lines can be given without quoting newlines """
+    return text.replace("\\n", "\n")
+
+
 def sanitize_python(name: str) -> str:
     return name.replace("_", "-")
 
@@ -70,8 +85,21 @@ def get_parser():
     config = cli.add_argument_group('config')
     cli_setup_labelmakerconfig(config, LabelMakerConfig)
     config.add_argument("--default-font", type=str, default="auto")
-    config.add_argument("--device", type=str, default="auto")
-    config.add_argument("--output", type=str, help="don't print just write the output to a png")
+    config.add_argument("--fit-text", action="store_true",
+                        help="scale every text to the label height, centered, instead of using a common font size")
+    config.add_argument("--max-text-width", type=int, default=0,
+                        help="with --fit-text, also keep every text at most this many pixels wide")
+    config.add_argument("--line-align", type=list_type_factory(str, ["left", "center", "right"]), default=(),
+                        help="alignment of the lines of texts with line breaks, comma separated per line, "
+                        "the last one holds for the lines after it")
+    config.add_argument("--line-sizes", type=list_type_factory(float), default=(),
+                        help="size of the lines of texts with line breaks relative to each other, e.g. 2,1,1")
+    config.add_argument("--device", type=str, default="auto",
+                        help="serial port of the printer, 'auto' or 'emulator' to print to a software printer")
+    config.add_argument("--output", type=str,
+                        help="don't print just write the output to a png. In batch mode {field} placeholders name "
+                        "the files of the records, which are numbered otherwise")
+    config.add_argument("--copies", type=int, default=1, help="number of copies to print over one connection")
 
     ### define the print modes
     print_modes = cli.add_subparsers(title="Print mode", dest="print_mode", required=True)
@@ -80,35 +108,61 @@ def get_parser():
         argument_default=argparse.SUPPRESS)
     label_file = print_modes.add_parser(
         "file", help="Open predefined label file that was generate from the UI")
+    batch = print_modes.add_parser(
+        "batch", help="Print a label for every record in a CSV or JSONL file. "
+        "{field} in the template is replaced with the field of the record, {index} with its number",
+        argument_default=argparse.SUPPRESS)
 
     ### the printables arguments
-    label.add_argument(
-        "-t", "--text", help="Text to write. Font is taken from --default-font",
-        type=str, action=OrderArguments)
-    label.add_argument(
+    add_printable_arguments(label)
+
+    ## add argument for label file
+    label_file.add_argument(
+        "label_file_name", help="File path to label project file",
+        type=str)
+
+    ## batch arguments, the template is either a label file or printables as in label mode
+    batch.add_argument(
+        "data_file_name", help="CSV file with a header row, or JSONL file with an object per line",
+        type=str)
+    batch.add_argument(
+        "--data-format", help="Format of the data file, by default taken from its extension",
+        choices=["csv", "jsonl"], default=None)
+    batch.add_argument(
+        "--template", help="Label file to use as template instead of printable arguments",
+        type=str, default=None)
+    batch.add_argument(
+        "--jobs", help="Number of processes to render the labels in, 0 for one per CPU",
+        type=int, default=1)
+    batch.add_argument(
+        "--stop-on-error", help="Stop at the first record that fails instead of skipping it",
+        action="store_true", default=False)
+    add_printable_arguments(batch)
+
+    return parser
+
+
+def add_printable_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "-t", "--text", help="Text to write. Font is taken from --default-font. \\n breaks the line, "
+        "the lines are sized to fit the label together",
+        type=multiline_text, action=OrderArguments)
+    parser.add_argument(
         "-q", "--qr-code", help="Argument is the qr-code data",
         type=str, action=OrderArguments)
-    label.add_argument(
+    parser.add_argument(
         "-s", "--spacing", help="Adds spacing. Argument should be int",
         type=int, action=OrderArguments)
-    label.add_argument(
+    parser.add_argument(
         "-b", "--barcode", help="Add barcode delimited with ':' in the format DATA:BARCODE_TYPE",
         type=tuple_type_factory([str,str]), action=OrderArguments)
-    label.add_argument(
+    parser.add_argument(
         "-l", "--labeled-barcode", help="Add barcode with label. See --barcode",
         type=tuple_type_factory([str,str]), action=OrderArguments)
-    label.add_argument(
+    parser.add_argument(
         "-i", "--image", help="Adds an image with format IMAGE_PATH:THRESHOLD. Where threshold is an int",
         type=tuple_type_factory([str, int]), action=OrderArguments)
 
-    ## add argument for label file
-    label_file.add_argument(
-        "label_file_name", help="File path to label project file",
-        type=str)
-
-
-    return parser
-
 
 ##############
 ## Parsers  ##
@@ -0,0 +1,109 @@
+import csv
+import json
+import os.path as path
+import string
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtGui import QImage
+
+from composer import LabelComposer
+from printables.printable import Printable
+
+Record = Dict[str, Any]
+
+DATA_FORMATS = ['csv', 'jsonl']
+
+# Data attributes of every printable type that hold content and can have placeholders. Fonts, image sources and the
+# like are used as is, they may contain braces.
+CONTENT_FIELDS: Dict[str, List[str]] = {
+    'Text': ['text'],
+    'Barcode': ['text'],
+    'QrCode': ['text'],
+}
+
+
+def guess_data_format(file_name: str) -> str:
+    extension = path.splitext(file_name)[1].lower().lstrip('.')
+    if extension in ('json', 'ndjson'):
+        return 'jsonl'
+    if extension in DATA_FORMATS:
+        return extension
+    raise ValueError(f"Cannot tell the format of '{file_name}', use --data-format")
+
+
+def read_records(file_name: str, data_format: Optional[str] = None) -> List[Record]:
+    """ Read the records of a CSV file with a header row, or of a file with a JSON object per line """
+    if data_format is None:
+        data_format = guess_data_format(file_name)
+
+    with open(file_name, newline='', encoding='utf-8-sig') as file:
+        if data_format == 'csv':
+            return list(csv.DictReader(file))
+
+        records = []
+        for line_number, line in enumerate(file, 1):
+            if line.strip() == '':
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f'{file_name}:{line_number}: expected a JSON object')
+            records.append(record)
+        return records
+
+
+def has_fields(text: str) -> bool:
+    """ Whether `text` has placeholders, text with unmatched braces is used as is """
+    try:
+        return any(field is not None for _, field, _, _ in string.Formatter().parse(text))
+    except ValueError:
+        return False
+
+
+def fill(text: str, record: Record, index: int) -> str:
+    """ Replace the {field} placeholders in `text`, {index} is the number of the record starting at 1 """
+    try:
+        return text.format_map({'index': index, **record})
+    except KeyError as x:
+        raise ValueError(f'No field {x} in record') from None
+
+
+def fill_item(item: Printable, record: Record, index: int) -> Printable:
+    """ A printable with the placeholders in its content fields filled in, or `item` itself if it has none
+
+    Reusing the template item keeps its render cached between records.
+    """
+    templates = {}
+    for name in CONTENT_FIELDS.get(item.get_type(), []):
+        value = getattr(item.data, name, None)
+        if isinstance(value, str) and has_fields(value):
+            templates[name] = value
+    if len(templates) == 0:
+        return item
+    data = item.data.clone()
+    for name, value in templates.items():
+        setattr(data, name, fill(value, record, index))
+    return type(item)(data)
+
+
+def fill_template(items: List[Printable], record: Record, index: int) -> List[Printable]:
+    return [fill_item(item, record, index) for item in items]
+
+
+def render_record(template: List[Printable], composer: LabelComposer, record: Record, index: int) -> QImage:
+    """ Compose the label of a record, raising the error of any printable that failed to render """
+    items = fill_template(template, record, index)
+    image = composer.compose(items)
+    for item in items:
+        if item.get_render_error() is not None:
+            raise item.get_render_error()
+    if image.width() == 0:
+        raise ValueError('Nothing to print')
+    return image
+
+
+def output_name(template: str, record: Record, index: int) -> str:
+    """ The file name for a record, numbered when `template` does not tell the records apart """
+    if not has_fields(template):
+        base, extension = path.splitext(template)
+        template = base + '-{index:04}' + extension
+    return fill(template, record, index)
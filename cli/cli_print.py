@@ -1,33 +1,50 @@
 from argparse import Namespace
-from typing import List, Tuple, Any, Optional
+from typing import List, Tuple, Any, Optional, Iterator, TYPE_CHECKING
+import contextlib
 import logging
+import os
+import sys
 
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QImage, QFont, QFontMetrics
+from PyQt6.QtGui import QGuiApplication, QImage, QFont, QFontMetrics
 
 from .arguments import dataclass_from_args
+from .batch import Record, read_records, render_record, output_name
+from printables import get_printable_class, get_printable_data_class
 from printables.printable import Printable
+from labelmaker import LabelMaker
 from labelmaker.comms import SerialPrinterDevice
 from labelmaker.config import LabelMakerConfig
-from gui.editor_window import EditorWindow
-from print_thread import PrintThread
+from composer import LabelComposer, load_items
+from raster import pack_print_image
 
 from margins import Margins
-from printables.printable import Printable
-from printables.text import TextData, Text, TextPropsEdit
-from printables.qrcode import QrCode, QrCodeData
-from printables.spacing import Spacing, SpacingData
-from printables.barcode import Barcode, BarcodeData
-from printables.image import Image, ImageData
+
+# Only what a command uses is imported, the printables, the device backends, the print thread and the render pool are
+# imported when needed
+if TYPE_CHECKING:
+    from .render_pool import RenderResult
+
+log = logging.getLogger(__name__)
+
 
 class CliPrint:
     def __init__(self, device: str):
         self.device_name = device
-        self.app = QApplication([])
-        self.editor = EditorWindow(self.app)
+        # Rendering only needs fonts and painting, not a display
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        self.app = QGuiApplication.instance() or QGuiApplication([])
+        self.items: List[Printable] = []
+        # The default tape is black on white, so nothing is inverted
+        self.composer = LabelComposer()
+        self.print_image: Optional[QImage] = None
+        # Records to fill the items in with, in batch mode
+        self.records: Optional[List[Record]] = None
+        # Processes to render the records in, 0 for one per CPU
+        self.jobs = 1
         self.label_config = None
         self.output = None
         self.ignore_printer = False
+        self.copies = 1
 
         logging.root.addHandler(logging.StreamHandler())
         logging.root.setLevel(logging.INFO)
@@ -38,6 +55,9 @@ class CliPrint:
             ports = SerialPrinterDevice.list_comports()
             if len(ports) > 0:
                 dev = SerialPrinterDevice(SerialPrinterDevice.list_comports()[0])
+        elif self.device_name == "emulator":
+            from labelmaker.emulator import EmulatedPrinterDevice
+            dev = EmulatedPrinterDevice()
         else:
             dev =  SerialPrinterDevice.find(self.device_name)
 
@@ -47,31 +67,87 @@ class CliPrint:
         self.label_config = config
 
     def add_printable(self, printable: Printable):
-        self.editor.sources.add_item(printable)
+        self.items.append(printable)
 
     def print(self):
-        self.editor.update_preview()
+        self.print_image = self.composer.compose(self.items)
 
-        assert self.editor.print_image is not None, "Unable to generate printable image"
+        assert self.print_image is not None, "Unable to generate printable image"
        
         if not self.ignore_printer:
+            from print_thread import PrintThread
             device = self.get_device()
             assert device is not None, f"Could not find device '{self.device_name}'"
 
             thread = PrintThread(
-                QImage(self.editor.print_image), device, 
-                self.label_config)
+                QImage(self.print_image), device, 
+                self.label_config, self.copies)
             thread.run()
         if self.output is not None:
-            self.editor.print_image.save(self.output)
+            self.print_image.save(self.output)
+
+    def render_batch(self) -> Iterator['RenderResult']:
+        """Render the label of every record in this process, see RenderPool.render"""
+        for index, record in enumerate(self.records, 1):
+            try:
+                image = render_record(self.items, self.composer, record, index)
+            except Exception as x:
+                yield index, record, None, str(x)
+                continue
+            yield index, record, image, None
+
+    def print_batch(self, stop_on_error: bool = False) -> int:
+        """Print a label for every record, with the placeholders in the items filled in from it
+
+        All labels are sent over a single connection, or written to files named after the output template. Records
+        that fail to render or save are reported and skipped, errors of the printer stop the batch. With more than one
+        job the labels are rendered in a pool of processes.
+        Returns the number of records that failed."""
+        label_maker = None
+        if not self.ignore_printer:
+            device = self.get_device()
+            assert device is not None, f"Could not find device '{self.device_name}'"
+            label_maker = LabelMaker(device, self.label_config)
+
+        total = len(self.records)
+        done = 0
+        failed = 0
+        with contextlib.ExitStack() as stack:
+            if label_maker is not None:
+                stack.enter_context(label_maker)
+            if self.jobs == 1:
+                results = self.render_batch()
+            else:
+                from .render_pool import RenderPool
+                pool = stack.enter_context(RenderPool(self.items, self.jobs or None))
+                results = pool.render(self.records)
+
+            for index, record, image, error in results:
+                if error is None and self.output is not None:
+                    file_name = output_name(self.output, record, index)
+                    if not image.save(file_name):
+                        error = f"Could not write '{file_name}'"
+                if error is not None:
+                    failed += 1
+                    log.error(f"[{index}/{total}] Record {index} failed: {error}")
+                    if stop_on_error:
+                        break
+                    continue
+
+                if label_maker is not None:
+                    label_maker.print_job([pack_print_image(image)] * self.copies)
+                done += 1
+                log.info(f"[{index}/{total}] {'Printed' if label_maker is not None else 'Saved ' + file_name}")
+
+        log.info(f"{done} of {total} labels done, {failed} failed")
+        return failed
 
     def set_output_only(self, output: Optional[str]):
         self.output = output
         self.ignore_printer = output is not None
 
     def open_file(self, file: str):
-        self.editor.current_file = file
-        self.editor.open()
+        self.items = load_items(file)
 
     @staticmethod
     def _calculate_text_properties(font_name):
@@ -81,6 +157,7 @@ class CliPrint:
         font = QFont(font_name)
         font_size = 68
 
+        from printables.text import TextPropsEdit
         adjusted_font_size = TextPropsEdit.calc_adjusted_size_for_font(font, font_size)
         font.setPixelSize(adjusted_font_size)
 
@@ -97,6 +174,11 @@ class CliPrint:
     
         return font, top_margin
 
+    @staticmethod
+    def create_printable(type_name: str, *args) -> Printable:
+        """Create a printable of the named type, with its data created from `args`"""
+        return get_printable_class(type_name)(get_printable_data_class(type_name)(*args))
+
     def printables_from_args(self, cli_args: Namespace):
         printable_args: List[Tuple[str, Any]] = cli_args.ordered_printables
         font = cli_args.default_font
@@ -104,21 +186,30 @@ class CliPrint:
         for (name, args) in printable_args:
             tmp = None
             match name:
+                case "text" if cli_args.fit_text:
+                    # Sized and centered per text when rendering, so it also fits the records of a batch
+                    tmp = self.create_printable("Text", args, QFont(font).toString(), Margins(), True,
+                                                cli_args.max_text_width, cli_args.line_align, cli_args.line_sizes)
+                case "text" if "\n" in args:
+                    # The lines are packed into the label height and centered as a block when rendering
+                    font, _ = self._calculate_text_properties(font)
+                    tmp = self.create_printable("Text", args, font.toString(), Margins(), False, 0,
+                                                cli_args.line_align, cli_args.line_sizes)
                 case "text":
                     font, vert_margin = self._calculate_text_properties(font)
                     margin = Margins(vert=vert_margin)
-                    tmp = Text(TextData(args, font.toString(), margin))
+                    tmp = self.create_printable("Text", args, font.toString(), margin)
                 case "qr_code":
-                    tmp = QrCode(QrCodeData(args))
+                    tmp = self.create_printable("QrCode", args)
                 case "spacing":
-                    tmp = Spacing(SpacingData(args))
+                    tmp = self.create_printable("Spacing", args)
                 case name if "barcode" in name:
                     has_label = "label" in name
                     text, code_type = args
-                    tmp = Barcode(BarcodeData(None, text, code_type, has_label))
+                    tmp = self.create_printable("Barcode", None, text, code_type, has_label)
                 case "image":
                     image_source, threshold = args
-                    tmp = Image(ImageData(image_source, int(threshold)))
+                    tmp = self.create_printable("Image", image_source, int(threshold))
 
             assert tmp != None
             self.add_printable(tmp)
@@ -131,12 +222,21 @@ class CliPrint:
         config = dataclass_from_args(args, LabelMakerConfig)
         cli.set_label_maker_config(config)
         cli.set_output_only(args.output)
+        cli.copies = args.copies
 
         match args.print_mode:
             case "label":
                 cli.printables_from_args(args)
             case "file":
                 cli.open_file(args.label_file_name)
+            case "batch":
+                if args.template is not None:
+                    cli.open_file(args.template)
+                else:
+                    assert "ordered_printables" in args, "Batch mode needs a --template or printable arguments"
+                    cli.printables_from_args(args)
+                cli.records = read_records(args.data_file_name, args.data_format)
+                cli.jobs = args.jobs
             case _:
                 raise NotImplementedError(f"{args.print_mode}")
 
@@ -145,5 +245,8 @@ class CliPrint:
     @classmethod
     def run(cls, args: Namespace):
         cli = cls.create(args)
-        cli.print()
+        if cli.records is None:
+            cli.print()
+        elif cli.print_batch(args.stop_on_error) > 0:
+            sys.exit(1)
 
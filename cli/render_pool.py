@@ -0,0 +1,155 @@
+"""
+Renders the labels of a batch in worker processes
+
+Every worker has its own offscreen QGuiApplication and keeps the template for
+the whole batch. Records are sent in chunks of consecutive records; a worker
+renders a chunk and writes the labels as packed 1bpp rows into one shared
+memory block, so only the name of the block and the sizes of the labels are
+pickled back. Chunks are collected in order, which makes the result the same
+as rendering the records one after the other.
+
+Blocks are named by the pool, so the blocks of chunks that were rendered but
+never read, when the batch stops early, are still freed on close.
+"""
+import multiprocessing
+import os
+import pickle
+import secrets
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from PyQt6.QtGui import QGuiApplication, QImage
+
+from composer import LabelComposer
+from printables.printable import Printable
+from raster import image_to_packed, packed_to_mono
+from .batch import Record, render_record
+
+# Records per task, enough to make the inter-process overhead small but still spread short batches over all workers
+CHUNK_SIZE = 16
+
+# Index and record, with either the label or the error of rendering it
+RenderResult = Tuple[int, Record, Optional[QImage], Optional[str]]
+
+# Index, width, height and offset of a label in the shared memory block, or its error
+ChunkEntry = Tuple[int, int, int, int, Optional[str]]
+
+# State of the worker process, see init_worker
+_app = None
+_template: List[Printable] = []
+_composer: Optional[LabelComposer] = None
+
+
+def init_worker(template: bytes):
+    global _app, _template, _composer
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    _app = QGuiApplication.instance() or QGuiApplication([])
+    _template = pickle.loads(template)
+    _composer = LabelComposer()
+
+
+def render_chunk(task: Tuple[str, List[Tuple[int, Record]]]) -> Tuple[Optional[str], List[ChunkEntry]]:
+    block_name, chunk = task
+    rows = []
+    entries = []
+    offset = 0
+    for index, record in chunk:
+        try:
+            image = render_record(_template, _composer, record, index)
+        except Exception as x:
+            entries.append((index, 0, 0, 0, str(x)))
+            continue
+        packed = image_to_packed(image)
+        rows.append(packed)
+        entries.append((index, image.width(), image.height(), offset, None))
+        offset += packed.nbytes
+
+    if offset == 0:
+        return None, entries
+
+    block = shared_memory.SharedMemory(name=block_name, create=True, size=offset)
+    try:
+        position = 0
+        for packed in rows:
+            block.buf[position:position + packed.nbytes] = packed.tobytes()
+            position += packed.nbytes
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    return block.name, entries
+
+
+def read_chunk(name: Optional[str], entries: List[ChunkEntry]) -> Iterator[Tuple[int, Optional[QImage], Optional[str]]]:
+    """ Copy the labels out of the shared memory block of a chunk and free it """
+    block = shared_memory.SharedMemory(name=name) if name is not None else None
+    try:
+        for index, width, height, offset, error in entries:
+            if error is not None:
+                yield index, None, error
+                continue
+            stride = (width + 7) // 8
+            packed = np.frombuffer(block.buf, dtype=np.uint8, count=stride * height, offset=offset)
+            image = packed_to_mono(packed.reshape(height, stride), width)
+            # The block cannot be closed while a view of it exists
+            del packed
+            yield index, image, None
+    finally:
+        if block is not None:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                # Already freed by RenderPool.close
+                pass
+
+
+def unlink_block(name: str):
+    """ Free a shared memory block if it exists """
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+class RenderPool:
+    """ Pool of processes that render the labels of a template filled in with records """
+
+    def __init__(self, template: List[Printable], processes: Optional[int] = None, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        # Short, the names of shared memory blocks are limited to 31 characters on macOS
+        self.block_prefix = f'ptc{os.getpid()}_{secrets.token_hex(3)}_'
+        # Blocks of chunks that were sent to the workers and not read yet
+        self.unread: Set[str] = set()
+        # Qt does not survive fork, the workers start a fresh interpreter
+        context = multiprocessing.get_context('spawn')
+        self.pool = context.Pool(processes, initializer=init_worker, initargs=(pickle.dumps(template),))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        # The workers are gone, so no more blocks are created
+        for name in self.unread:
+            unlink_block(name)
+        self.unread.clear()
+
+    def render(self, records: List[Record]) -> Iterator[RenderResult]:
+        """ Render every record, yielding the labels in the order of the records """
+        numbered = list(enumerate(records, 1))
+        chunks = [numbered[i:i + self.chunk_size] for i in range(0, len(numbered), self.chunk_size)]
+        tasks = [(f'{self.block_prefix}{number}', chunk) for number, chunk in enumerate(chunks)]
+        self.unread.update(name for name, _ in tasks)
+        for (block_name, chunk), (name, entries) in zip(tasks, self.pool.imap(render_chunk, tasks)):
+            for (index, record), (_, image, error) in zip(chunk, read_chunk(name, entries)):
+                yield index, record, image, error
+            self.unread.discard(block_name)
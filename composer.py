@@ -0,0 +1,177 @@
+import logging
+import pickle
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import Qt, QRect, QPoint, QMargins
+from PyQt6.QtGui import QImage, QPainter, QBitmap
+
+from labelmaker import USABLE_HEIGHT
+from printables.printable import Printable
+from raster import pack_print_image
+
+log = logging.getLogger(__name__)
+
+# Printables that are drawn in the tape colors swapped on tapes with a dark background
+INVERTED_TYPES = ['Image', 'Barcode', 'QrCode']
+
+Color = Tuple[int, int, int]
+
+
+def needs_invert(fg: Color, bg: Color) -> bool:
+    """ Whether the tape background is darker than the text """
+    return sum(bg) < sum(fg)
+
+
+def load_items(file_name: str) -> List[Printable]:
+    with open(file_name, 'rb') as file:
+        unpickler = pickle.Unpickler(file)
+        return unpickler.load()
+
+
+def save_items(file_name: str, items: List[Printable]):
+    with open(file_name, 'wb') as file:
+        pickler = pickle.Pickler(file)
+        pickler.dump(items)
+
+
+class LabelComposer:
+    """ Lays out printables next to each other and paints them on a label high Format_Mono image
+
+    Only needs a QGuiApplication, which can use the offscreen platform. Composing the same (or an edited) list of items
+    again only renders the items that changed and only repaints the columns that moved.
+    """
+
+    def __init__(self, invert: bool = False):
+        self.invert = invert
+
+        # The composed label, and where every item ends on it
+        self.image: Optional[QImage] = None
+        self.item_offsets: List[int] = []
+
+        # The first and last (exclusive) column that changed in the last compose
+        self.dirty: Tuple[int, int] = (0, 0)
+
+        # Printable -> (rendered image, bitmap of it)
+        self.bitmap_cache = {}
+
+        # (item, bitmap, dst_rect, src_rect, invert) of everything painted on image
+        self.composed_items = []
+
+    def reset(self):
+        """ Forget the previous label, so the next compose paints everything """
+        self.image = None
+        self.item_offsets = []
+        self.bitmap_cache = {}
+        self.composed_items = []
+
+    def compose(self, items: List[Printable]) -> QImage:
+        item_renders = []
+        item_offsets = []
+        width_needed = 0
+
+        bitmaps = {}
+        for item in items:
+            # Only items whose content changed are rendered again
+            image = item.render_cached()
+            cached = self.bitmap_cache.get(item)
+            if cached is not None and cached[0] is image:
+                render = cached[1]
+            else:
+                render = QBitmap(image)
+            bitmaps[item] = (image, render)
+            render_error = item.get_render_error()
+            if render_error is not None:
+                log.warning(f'Skipping {item.get_type()}: {render_error}')
+                continue
+            margins = item.get_margins()
+            src_rect = render.rect().marginsAdded(QMargins(margins.left, 0, margins.right, 0))
+            sz = src_rect.size()
+            dst_rect = QRect(QPoint(), sz.scaled(sz * margins.scale, Qt.AspectRatioMode.KeepAspectRatio))
+            dst_rect.translate(width_needed, margins.vert + ((USABLE_HEIGHT - dst_rect.height()) // 2))
+            invert = self.invert and item.get_type() in INVERTED_TYPES
+            item_renders.append((item, render, dst_rect, src_rect, invert))
+            width_needed += dst_rect.width()
+            item_offsets.append(width_needed)
+        self.bitmap_cache = bitmaps
+
+        image, left, right = self.paint(item_renders, width_needed)
+
+        self.image = image
+        self.item_offsets = item_offsets
+        self.composed_items = item_renders
+        self.dirty = (left, right)
+        return image
+
+    def raster(self) -> bytearray:
+        """ The composed label packed for the printer, see `raster.pack_print_image` """
+        assert self.image is not None, 'Nothing has been composed'
+        return pack_print_image(self.image)
+
+    def paint(self, item_renders, width: int) -> Tuple[QImage, int, int]:
+        """ Paint the items onto the label image, reusing the parts of the previous image that did not change
+
+        Items at the start and end of the label that are unchanged keep their pixels, the ones at the end are shifted
+        if the width of the label changed. Only the columns in between are painted.
+
+        :returns: The label image and the first and last (exclusive) column that were painted.
+        """
+        bg_color = Qt.GlobalColor.white
+        old_items = self.composed_items
+        old_image = self.image
+        if old_image is None or old_image.isNull() or old_image.height() != USABLE_HEIGHT:
+            old_items = []
+        old_width = old_image.width() if len(old_items) > 0 else 0
+        shift = width - old_width
+
+        def same(old, new, dx):
+            return old[0] is new[0] and old[1] is new[1] and old[2].translated(dx, 0) == new[2] \
+                and old[3] == new[3] and old[4] == new[4]
+
+        start = 0
+        while start < min(len(old_items), len(item_renders)) and same(old_items[start], item_renders[start], 0):
+            start += 1
+        end = len(item_renders)
+        old_end = len(old_items)
+        while end > start and old_end > start and same(old_items[old_end - 1], item_renders[end - 1], shift):
+            end -= 1
+            old_end -= 1
+
+        left = item_renders[start - 1][2].right() + 1 if start > 0 else 0
+        right = item_renders[end][2].left() if end < len(item_renders) else width
+        reuse = len(old_items) > 0 and shift == 0
+        if reuse and left >= right:
+            return old_image, left, left
+
+        if reuse:
+            image = old_image
+        else:
+            image = QImage(width, USABLE_HEIGHT, QImage.Format.Format_Mono)
+            if width == 0:
+                return image, 0, 0
+            image.fill(bg_color)
+            if len(old_items) > 0:
+                # A source width of 0 would copy the whole image
+                with QPainter(image) as painter:
+                    if left > 0:
+                        painter.drawImage(0, 0, old_image, 0, 0, left, USABLE_HEIGHT)
+                    if width > right:
+                        painter.drawImage(right, 0, old_image, right - shift, 0, width - right, USABLE_HEIGHT)
+
+        painter = QPainter(image)
+        painter.setClipRect(QRect(left, 0, right - left, USABLE_HEIGHT))
+        painter.fillRect(QRect(left, 0, right - left, USABLE_HEIGHT), bg_color)
+        painter.setBackgroundMode(Qt.BGMode.OpaqueMode)
+        for _, render, dst_rect, src_rect, invert in item_renders[start:end]:
+            fill_rect = QRect(dst_rect.left(), 0, dst_rect.width(), USABLE_HEIGHT)
+            painter.fillRect(fill_rect, bg_color)
+            if invert:
+                painter.setBackground(Qt.GlobalColor.black)
+                painter.setPen(Qt.GlobalColor.white)
+            else:
+                painter.setBackground(Qt.GlobalColor.white)
+                painter.setPen(Qt.GlobalColor.black)
+            painter.drawPixmap(dst_rect, render, src_rect)
+        painter.end()
+        del painter
+
+        return image, left, right
@@ -0,0 +1,118 @@
+"""
+Conversion of grayscale values (0-255) to black and white
+
+All functions take a (height, width) array of values and return a bool array
+of the same shape, True for white pixels. Pixels are white when they are
+brighter than `threshold`, dithering spreads the difference over the
+neighbouring pixels.
+
+Error diffusion is inherently sequential, but every pixel only depends on
+pixels to its left and in the rows above. Pixels on the line x + 2y = t can
+therefore be processed at once, which makes the number of steps the width
+plus twice the height instead of the number of pixels. Labels are only a few
+dozen pixels high, so this is close to one step per column.
+"""
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Kernels as (dy, dx, weight)
+FLOYD_STEINBERG: List[Tuple[int, int, float]] = [
+    (0, 1, 7 / 16),
+    (1, -1, 3 / 16),
+    (1, 0, 5 / 16),
+    (1, 1, 1 / 16),
+]
+
+# Atkinson only diffuses 6/8 of the error, which keeps more contrast
+ATKINSON: List[Tuple[int, int, float]] = [
+    (0, 1, 1 / 8),
+    (0, 2, 1 / 8),
+    (1, -1, 1 / 8),
+    (1, 0, 1 / 8),
+    (1, 1, 1 / 8),
+    (2, 0, 1 / 8),
+]
+
+# Every row of the wavefront starts this many columns after the one above it
+SKEW = 2
+
+
+def bayer_matrix(order: int) -> np.ndarray:
+    """ The 2^order x 2^order Bayer index matrix, with values 0 to 4^order - 1 """
+    m = np.zeros((1, 1), dtype=np.intp)
+    for _ in range(order):
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    return m
+
+
+BAYER_8X8 = bayer_matrix(3)
+
+
+def threshold(values: np.ndarray, level: int = 127) -> np.ndarray:
+    return values > level
+
+
+def bayer(values: np.ndarray, level: int = 127, matrix: np.ndarray = BAYER_8X8) -> np.ndarray:
+    """ Ordered dithering, comparing every pixel to a threshold taken from a tiled Bayer matrix """
+    height, width = values.shape
+    n = matrix.shape[0]
+    # Spread the thresholds evenly over the full range, centered on `level`
+    offsets = (matrix + 0.5) / matrix.size * 255 - 127.5
+    tiled = np.tile(offsets, ((height + n - 1) // n, (width + n - 1) // n))[:height, :width]
+    return values > level + tiled
+
+
+def error_diffusion(values: np.ndarray, kernel: List[Tuple[int, int, float]], level: int = 127) -> np.ndarray:
+    """ Dither by diffusing the quantization error of every pixel to its neighbours as given by `kernel` """
+    height, width = values.shape
+    if height == 0 or width == 0:
+        return np.zeros((height, width), dtype=bool)
+
+    reach = max(dx + SKEW * dy for dy, dx, _ in kernel)
+    if min(dx + SKEW * dy for dy, dx, _ in kernel) < 1:
+        raise ValueError('Kernel does not fit the wavefront')
+    max_dy = max(dy for dy, _, _ in kernel)
+
+    # Skewed so that step t holds pixel (y, t - SKEW * y) of every row y, one step per array row. Error that is
+    # diffused outside of the image ends up in the padding and is discarded.
+    steps = width + SKEW * (height - 1)
+    skewed = np.zeros((steps + reach + 1, height + max_dy), dtype=np.float32)
+    t = np.arange(width)[:, np.newaxis] + SKEW * np.arange(height)[np.newaxis, :]
+    rows = np.broadcast_to(np.arange(height), t.shape)
+    skewed[t, rows] = values.T
+
+    # Weights of the error diffused to the next `reach` steps, per row offset
+    weights = np.zeros((max_dy + 1, reach), dtype=np.float32)
+    for dy, dx, weight in kernel:
+        weights[dy, dx + SKEW * dy - 1] = weight
+    weights = [(dy, w[:, np.newaxis]) for dy, w in enumerate(weights) if w.any()]
+
+    for step in range(steps):
+        # Rows of the image that have a pixel in this step
+        lo = max(0, -((width - 1 - step) // SKEW))
+        hi = min(height, step // SKEW + 1)
+        # Values are final once their step is reached, so they are compared with the level again at the end
+        current = skewed[step, lo:hi]
+        error = current - (current > level) * np.float32(255)
+        for dy, w in weights:
+            skewed[step + 1:step + 1 + reach, lo + dy:hi + dy] += w * error
+
+    return skewed[t, rows].T > level
+
+
+def floyd_steinberg(values: np.ndarray, level: int = 127) -> np.ndarray:
+    return error_diffusion(values, FLOYD_STEINBERG, level)
+
+
+def atkinson(values: np.ndarray, level: int = 127) -> np.ndarray:
+    return error_diffusion(values, ATKINSON, level)
+
+
+# Available methods by the key stored in ImageData, with their display names
+METHODS: Dict[str, Tuple[str, Callable[[np.ndarray, int], np.ndarray]]] = {
+    'threshold': ('None (threshold)', threshold),
+    'floyd-steinberg': ('Floyd-Steinberg', floyd_steinberg),
+    'atkinson': ('Atkinson', atkinson),
+    'bayer': ('Ordered (Bayer)', bayer),
+}
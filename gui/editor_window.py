@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 import logging
-import pickle
 
-from PyQt6.QtCore import Qt, QRect, QPoint, QMargins, QModelIndex
-from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor, QIcon, QBitmap
+from PyQt6.QtCore import Qt, QModelIndex
+from PyQt6.QtGui import QImage, QIcon
 from PyQt6.QtWidgets import QApplication, QVBoxLayout, QPushButton, QLabel, QFileDialog, QHBoxLayout, \
-    QGroupBox, QMessageBox, QMainWindow, QScrollArea, QSizePolicy
+    QGroupBox, QMessageBox, QMainWindow, QScrollArea, QSizePolicy, QSpinBox
 
 from app import APP_NAME, APP_VERSION
+from composer import LabelComposer, needs_invert, load_items, save_items
 from labelmaker import USABLE_HEIGHT
 from print_thread import PrintThread
 from printables.printable import Printable
@@ -16,6 +16,7 @@ from settings import Settings
 from util import *
 from .log_console import LogConsoleModal
 from .preview_image import PreviewImage
+from .preview_scheduler import PreviewScheduler
 from .printer_select import PrinterSelect
 from .source_items import SourceItems
 from .tape_select import TapeSelect
@@ -46,6 +47,12 @@ class EditorWindow(QMainWindow):
         self.current_item = None
         self.print_thread = None
         self.item_preview_offsets = []
+
+        # Lays out and paints the items on print_image
+        self.composer = LabelComposer()
+
+        self.preview_scheduler = PreviewScheduler(self)
+        app.aboutToQuit.connect(self.preview_scheduler.stop)
         self.needs_invert = False
 
         Settings.load()
@@ -138,6 +145,12 @@ class EditorWindow(QMainWindow):
         bottom_bar.addWidget(self.tape_select)
         bottom_bar.addStretch()
 
+        self.copies = QSpinBox(self)
+        self.copies.setMinimum(1)
+        self.copies.setMaximum(999)
+        bottom_bar.addWidget(QLabel('Copies:'))
+        bottom_bar.addWidget(self.copies)
+
         print_button = QPushButton('Print')
         print_button.setFixedWidth(100)
         bottom_bar.addWidget(print_button)
@@ -181,6 +194,10 @@ class EditorWindow(QMainWindow):
     def on_quit(self):
         self.close()
 
+    def closeEvent(self, event):
+        self.preview_scheduler.stop()
+        super().closeEvent(event)
+
     def on_save(self):
         if self.current_file is None:
             self.on_save_as()
@@ -205,6 +222,7 @@ class EditorWindow(QMainWindow):
         self.save()
 
     def on_export(self):
+        self.preview_scheduler.flush()
         if self.print_image is None:
             return
 
@@ -247,30 +265,26 @@ class EditorWindow(QMainWindow):
         fg, bg = self.tape_select.get_colors(index)
         self.preview_image.update_colors(fg, bg)
 
-        needs_invert = sum(bg) < sum(fg)
-        if needs_invert != self.needs_invert:
-            self.needs_invert = needs_invert
+        invert = needs_invert(fg, bg)
+        if invert != self.needs_invert:
+            self.needs_invert = invert
             self.update_preview()
         else:
             self.preview_image.repaint_preview()
 
     def save(self):
-        with open(self.current_file, 'wb') as file:
-            pickler = pickle.Pickler(file)
-            pickler.dump(self.sources.items.items)
+        save_items(self.current_file, self.sources.items.items)
 
     def open(self):
-        with open(self.current_file, 'rb') as file:
-            unpickler = pickle.Unpickler(file)
-            items = unpickler.load()
+        items = load_items(self.current_file)
 
-            self.sources.items.clear()
+        self.sources.items.clear()
 
-            for item in items:
-                self.sources.items.add(item)
-            self.update_preview()
-            self.item_selected = None
-            self.update_props()
+        for item in items:
+            self.sources.items.add(item)
+        self.update_preview()
+        self.item_selected = None
+        self.update_props()
 
     def preview_item_clicked(self, index: int):
         self.sources.table.selectRow(index)
@@ -291,12 +305,13 @@ class EditorWindow(QMainWindow):
 
         
         log.info('Starting print thread...')
+        self.preview_scheduler.flush()
 
         print_device = self.printer_select.currentData()
 
         # print_device = self.printer_select.currentData(1)
         log.debug(f'Using device: {print_device}')
-        self.print_thread = PrintThread(QImage(self.print_image), print_device)
+        self.print_thread = PrintThread(QImage(self.print_image), print_device, copies=self.copies.value())
         self.print_thread.done.connect(done)
 
         self.print_thread.start()
@@ -308,56 +323,18 @@ class EditorWindow(QMainWindow):
     def update_current_item(self):
         self.sources.update_current_item()
 
+    def schedule_preview(self):
+        """ Update the preview soon, coalescing edits and rendering off the GUI thread """
+        self.preview_scheduler.schedule()
+
     def update_preview(self):
-        item_renders = []
-        item_preview_offsets = []
-        width_needed = 0
-        bg_color = Qt.GlobalColor.white
-
-        items = self.sources.items.items
-        for i, item in enumerate(items):
-            render = QBitmap(item.render())
-            render_error = item.get_render_error()
-            if render_error is not None:
-                print(render_error)
-                continue
-            # TODO: Decide how to present this to the user:
-            #     QMessageBox.warning(self, 'Failed to render item', 'Failed to render item:\n' + str(render_error))
-            margins = item.get_margins()
-            src_rect = render.rect().marginsAdded(QMargins(margins.left, 0, margins.right, 0))
-            sz = src_rect.size()
-            dst_rect = QRect(QPoint(), sz.scaled(sz * margins.scale, Qt.AspectRatioMode.KeepAspectRatio))
-            # dst_rect.marginsAdded(margins.getQMargins())
-            dst_rect.translate(width_needed, margins.vert + ((USABLE_HEIGHT - dst_rect.height()) // 2))
-            invert = self.needs_invert and item.get_type() in ['Image', 'Barcode', 'QRCode']
-            item_renders.append((render, dst_rect, src_rect, invert))
-            width_needed += dst_rect.width()
-            item_preview_offsets.append(width_needed)
-
-        x = 0
-        image = QImage(width_needed, USABLE_HEIGHT, QImage.Format.Format_Mono)
-        image.fill(bg_color)
-        painter = QPainter(image)
-        painter.setBackgroundMode(Qt.BGMode.OpaqueMode)
-        for render, dst_rect, src_rect, invert in iter(item_renders):
-            fill_rect = QRect(dst_rect.left(), 0, dst_rect.width(), USABLE_HEIGHT)
-            painter.fillRect(fill_rect, bg_color)
-            if invert:
-                painter.setBackground(Qt.GlobalColor.black)
-                painter.setPen(Qt.GlobalColor.white)
-            else:
-                painter.setBackground(Qt.GlobalColor.white)
-                painter.setPen(Qt.GlobalColor.black)
-            painter.drawPixmap(dst_rect, render, src_rect)
-            x += fill_rect.width()
-        painter.end()
-        del painter
+        self.composer.invert = self.needs_invert
+        image = self.composer.compose(self.sources.items.items)
 
         self.print_image = image
-        self.preview_image.set_item_offsets(item_preview_offsets)
+        self.preview_image.set_item_offsets(self.composer.item_offsets)
         # self.preview_image.selected_index = selected_index
-        self.preview_image.setPixmap(QPixmap.fromImage(image))
-        self.preview_image.repaint()
+        self.preview_image.set_image(image, *self.composer.dirty)
 
     def selected_item_changed(self, item: Optional[Printable]):
         if self.current_item == item:
@@ -1,6 +1,6 @@
 from typing import Optional, List, Tuple
 
-from PyQt6.QtCore import pyqtSignal, QRect, Qt
+from PyQt6.QtCore import pyqtSignal, QRect, Qt, QPoint
 from PyQt6.QtGui import QPainter, QImage, QPixmap, QColor, QPalette, QBitmap, QRegion
 from PyQt6.QtWidgets import QLabel, QWidget
 from qasync import QtGui
@@ -8,6 +8,9 @@ from qasync import QtGui
 from gui.types import Color
 from labelmaker import USABLE_HEIGHT
 
+# Height of the selection indicator below the label
+SELECTION_HEIGHT = 4
+
 
 class PreviewImage(QLabel):
     preview_item_clicked = pyqtSignal(int, name='preview_item_clicked')
@@ -19,33 +22,36 @@ class PreviewImage(QLabel):
         self.setFixedHeight(USABLE_HEIGHT + 2)
         self.fg_color = Qt.GlobalColor.black
         self.bg_color = Qt.GlobalColor.white
-        self.preview_bitmap = QPixmap()
+        self.label_image = QImage()
+
+        # The label in tape colors with the selection below it, painted in place and shown by paintEvent
+        self.canvas: Optional[QPixmap] = None
 
     def update_colors(self, fg: Color, bg: Color, repaint=True):
         self.fg_color = QColor(*fg)
         self.bg_color = QColor(*bg)
 
     def repaint_preview(self):
-        pixmap = self.pixmap()
-        if pixmap is None:
+        if self.canvas is None:
             return
-        painter = QPainter(pixmap)
+        painter = QPainter(self.canvas)
         self.draw_preview(painter)
         painter.end()
-        self.repaint(self.preview_bitmap.rect())
+        self.update()
 
     def update_selected(self, selected_index: int):
         self.selected_index = selected_index
-        pixmap = self.pixmap()
-        if pixmap is None:
+        if self.canvas is None:
             return
-        if pixmap.width() > 0:
-            with QPainter(pixmap) as painter:
-                self.draw_selection(painter)
-        self.repaint(QRect(0, USABLE_HEIGHT-1, self.preview_bitmap.width(), 4))
+        with QPainter(self.canvas) as painter:
+            self.draw_selection(painter)
+        self.update_canvas(self.selection_rect())
+
+    def selection_rect(self) -> QRect:
+        return QRect(0, USABLE_HEIGHT, self.label_image.width(), SELECTION_HEIGHT)
 
     def draw_selection(self, painter: QPainter):
-        select_rect = QRect(0, USABLE_HEIGHT, 0, 4)
+        select_rect = QRect(0, USABLE_HEIGHT, 0, SELECTION_HEIGHT)
         palette = self.palette()
         for index, offset in enumerate(self.item_offsets):
             select_rect.translate(select_rect.width(), 0)
@@ -54,21 +60,79 @@ class PreviewImage(QLabel):
             painter.fillRect(select_rect, color)
 
     def setPixmap(self, a0: QtGui.QPixmap) -> None:
-        self.preview_bitmap = QBitmap(a0)
-        img = QImage(a0.width(), a0.height() + 4, QImage.Format.Format_RGB32)
-        img.fill(self.palette().color(QPalette.ColorRole.Window))
-        if a0.width() > 0:
-            with QPainter(img) as painter:
-                self.draw_preview(painter)
-                self.draw_selection(painter)
-        super().setPixmap(QPixmap(img))
-        self.repaint()
-
-    def draw_preview(self, painter: QPainter):
+        self.set_image(a0.toImage().convertToFormat(QImage.Format.Format_Mono))
+
+    def set_image(self, image: QImage, left: int = 0, right: Optional[int] = None):
+        """ Show a new label image, of which only the columns from `left` up to `right` changed
+
+        The columns after `right` are the same as the last columns of the previous image, which are shifted if the width
+        changed. Without `right` the whole image is repainted.
+        """
+        width = image.width()
+        height = image.height() + SELECTION_HEIGHT
+        old = self.canvas
+        self.label_image = image
+
+        if width == 0:
+            self.canvas = None
+            super().setPixmap(QPixmap())
+            return
+
+        if right is None or old is None or old.height() != height:
+            left, right = 0, width
+            old = None
+
+        resized = old is None or old.width() != width
+        if resized:
+            canvas = QPixmap(width, height)
+            canvas.fill(self.palette().color(QPalette.ColorRole.Window))
+            if old is not None:
+                # A source width of 0 would copy the whole pixmap
+                with QPainter(canvas) as painter:
+                    if left > 0:
+                        painter.drawPixmap(0, 0, old, 0, 0, left, height)
+                    if width > right:
+                        painter.drawPixmap(right, 0, old, old.width() - (width - right), 0, width - right, height)
+            self.canvas = canvas
+
+        dirty = QRect(left, 0, right - left, image.height())
+        with QPainter(self.canvas) as painter:
+            if right > left:
+                painter.fillRect(dirty, self.palette().color(QPalette.ColorRole.Window))
+                self.draw_preview(painter, dirty)
+            self.draw_selection(painter)
+
+        if resized:
+            # Resizes the label to the new width
+            super().setPixmap(self.canvas)
+            self.update()
+        else:
+            self.update_canvas(dirty.united(self.selection_rect()))
+
+    def canvas_origin(self) -> QPoint:
+        """ Where QLabel places the canvas, left aligned and vertically centered """
+        rect = self.contentsRect()
+        return QPoint(rect.left(), rect.top() + (rect.height() - self.canvas.height()) // 2)
+
+    def update_canvas(self, rect: QRect):
+        self.update(rect.translated(self.canvas_origin()))
+
+    def paintEvent(self, ev: QtGui.QPaintEvent) -> None:
+        if self.canvas is None:
+            super().paintEvent(ev)
+            return
+        origin = self.canvas_origin()
+        with QPainter(self) as painter:
+            target = ev.rect()
+            painter.drawPixmap(target, self.canvas, target.translated(-origin))
+
+    def draw_preview(self, painter: QPainter, rect: Optional[QRect] = None):
+        if rect is None:
+            rect = self.label_image.rect()
         painter.setBackgroundMode(Qt.BGMode.OpaqueMode)
         painter.setBackground(self.bg_color)
         painter.setPen(self.fg_color)
-        painter.drawPixmap(0, 0, self.preview_bitmap)
+        painter.drawPixmap(rect.topLeft(), QBitmap.fromImage(self.label_image.copy(rect)))
 
     def mousePressEvent(self, ev: QtGui.QMouseEvent) -> None:
         x = ev.pos().x()
@@ -0,0 +1,114 @@
+import logging
+from typing import Hashable, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QImage
+
+from printables.printable import Printable, PrintableData
+
+log = logging.getLogger(__name__)
+
+# Time to wait for more edits before rendering, in milliseconds
+DEBOUNCE_MS = 30
+
+RenderJob = Tuple[Printable, Hashable, PrintableData]
+RenderResult = Tuple[Printable, Hashable, QImage, Optional[Exception]]
+
+
+class PreviewRenderer(QObject):
+    """ Renders snapshots of printables on the worker thread """
+
+    done = pyqtSignal(int, object)
+
+    def __init__(self, scheduler: 'PreviewScheduler'):
+        super().__init__()
+        self.scheduler = scheduler
+
+    @pyqtSlot(int, object)
+    def render(self, generation: int, jobs: List[RenderJob]):
+        results: List[RenderResult] = []
+        for item, key, snapshot in jobs:
+            if generation != self.scheduler.generation:
+                log.debug(f'Dropping stale preview render {generation}')
+                return
+            # Render a copy, so the item can keep being edited on the GUI thread in the mean time
+            printable = type(item)(snapshot)
+            try:
+                image = printable.render()
+            except Exception as x:
+                log.error(f'Failed to render {item.get_type()}: {x}')
+                image = QImage()
+                printable.render_error = x
+            results.append((item, key, image, printable.render_error))
+        self.done.emit(generation, results)
+
+
+class PreviewScheduler(QObject):
+    """ Coalesces preview updates and renders the changed printables off the GUI thread
+
+    Every burst of edits within DEBOUNCE_MS results in a single render of only the printables whose content changed.
+    Renders that are overtaken by newer edits are cancelled, and only the latest result is composed into the preview.
+    """
+
+    request = pyqtSignal(int, object)
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.generation = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(DEBOUNCE_MS)
+        self.timer.timeout.connect(self.start)
+
+        # The worker thread is only started once something is scheduled
+        self.worker_thread: Optional[QThread] = None
+        self.renderer: Optional[PreviewRenderer] = None
+
+    def schedule(self):
+        """ Update the preview once no more edits arrive for DEBOUNCE_MS, cancelling any render in progress """
+        self.generation += 1
+        self.timer.start()
+
+    def flush(self):
+        """ Update the preview right away, on the GUI thread, superseding anything scheduled or in progress """
+        self.timer.stop()
+        self.generation += 1
+        self.editor.update_preview()
+
+    def start_thread(self):
+        self.worker_thread = QThread()
+        self.renderer = PreviewRenderer(self)
+        self.renderer.moveToThread(self.worker_thread)
+        self.request.connect(self.renderer.render)
+        self.renderer.done.connect(self.finished)
+        self.worker_thread.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.generation += 1
+        if self.worker_thread is not None:
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+            self.worker_thread = None
+
+    def start(self):
+        jobs: List[RenderJob] = [(item, item.get_content_key(), item.data.clone())
+                                 for item in self.editor.sources.items.items if not item.is_render_cached()]
+        if len(jobs) == 0:
+            # Only the layout changed
+            self.editor.update_preview()
+            return
+
+        if self.worker_thread is None:
+            self.start_thread()
+        self.request.emit(self.generation, jobs)
+
+    def finished(self, generation: int, results: List[RenderResult]):
+        if generation != self.generation:
+            return
+        for item, key, image, render_error in results:
+            if key == item.get_content_key():
+                item.set_render_cache(key, image, render_error)
+        self.editor.update_preview()
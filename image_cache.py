@@ -0,0 +1,67 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from PyQt6.QtGui import QImage
+
+FileKey = Tuple[str, int, int]
+
+
+def file_key(file_name: str) -> FileKey:
+    """ Identify a version of a file by its path, modification time and size """
+    st = os.stat(file_name)
+    return os.path.abspath(file_name), st.st_mtime_ns, st.st_size
+
+
+class ImageCache:
+    """ Least recently used cache of images, bounded by the total size of the image data
+
+    QImage is implicitly shared, so returning cached images does not copy them, and painting on a returned image
+    detaches it from the cached one.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.images: 'OrderedDict[Hashable, QImage]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[QImage]:
+        with self.lock:
+            image = self.images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.images.move_to_end(key)
+            return image
+
+    def put(self, key: Hashable, image: QImage):
+        size = image.sizeInBytes()
+        with self.lock:
+            old = self.images.pop(key, None)
+            if old is not None:
+                self.size -= old.sizeInBytes()
+            if size > self.max_bytes:
+                # Would evict everything else and still not fit
+                return
+            self.images[key] = image
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.images.popitem(last=False)
+                self.size -= evicted.sizeInBytes()
+
+    def get_or_create(self, key: Hashable, create: Callable[[], QImage]) -> QImage:
+        image = self.get(key)
+        if image is None:
+            image = create()
+            self.put(key, image)
+        return image
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.size = 0
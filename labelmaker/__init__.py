@@ -1,12 +1,13 @@
 #!/usr/bin/env python
 import logging
 import sys
-from typing import Optional
+from typing import List, Optional
 
-from .encode import encode_raster_transfer, read_png
+from .encode import read_png, RASTER_LINE_SIZE
+from .commands import CommandBuilder
 from .config import LabelMakerConfig
 from labelmaker.comms import PrinterDevice, SerialPrinterDevice
-from labelmaker.format import Mode
+from labelmaker.format import Mode, Page
 from labelmaker.status import Status
 
 BUFFER_HEIGHT = 128
@@ -16,6 +17,14 @@ USABLE_HEIGHT = BUFFER_HEIGHT - (PRINT_MARGIN * 2)
 log = logging.getLogger(__name__)
 
 
+def __getattr__(name: str):
+    # The asyncio client is only imported when used, the CLI and the print thread do not need asyncio
+    if name == 'AsyncLabelMaker':
+        from .aio import AsyncLabelMaker
+        return AsyncLabelMaker
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 class LabelMaker:
 
     def log(self, m: str):
@@ -30,12 +39,39 @@ class LabelMaker:
 
         self.ser = serial_device.open()
 
+        # Whether the connection has been through the status query and buffer flush yet
+        self.prepared = False
+
+        # Keep the connection open between labels, see __enter__
+        self.in_session = False
+
+    def __enter__(self):
+        """ Start a session that keeps the connection open across print_label and print_job calls """
+        self.in_session = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.in_session = False
+        self.close()
+
+    def close(self):
+        if self.prepared:
+            # Initialize
+            self.send(CommandBuilder().initialize())
+            self.prepared = False
+        self.ser.close()
+
     def set_config(self, config: LabelMakerConfig):
         self.config = config
 
+    def send(self, commands: CommandBuilder):
+        """ Write all commands in the builder using as few writes as possible """
+        for chunk in commands.chunks():
+            self.ser.write(chunk)
+
     def query_status(self):
         self.log("Query status...")
-        self.ser.write(b"\x1b\x69\x53")
+        self.send(CommandBuilder().query_status())
         raw = self.ser.read(size=32)
         return raw
 
@@ -49,156 +85,80 @@ class LabelMaker:
     # The print buffer is cleared, and the arrangement position is returned to the origin on the page.
     def initialize(self):
         self.log("Initialize...")
-        self.ser.write(b"\x1b\x40")
+        self.send(CommandBuilder().initialize())
 
     def set_graphics_mode(self, graphics_mode=Mode.PTCBP):
         self.log("Entering raster graphics (PTCBP) mode...")
-        self.ser.write(bytes([0x1b, 0x69, 0x61, graphics_mode]))
+        self.send(CommandBuilder().set_graphics_mode(graphics_mode))
 
     def set_modes(self, mirror_printing=False, auto_tape_cut=False):
-        mode = 0
-        if mirror_printing:
-            mode |= (1 << 7)
-        if auto_tape_cut:
-            mode |= (1 << 6)
         self.log(f"Setting mode flags MirrorPrinting: {mirror_printing} AutoTapeCut: {auto_tape_cut}...")
-        self.ser.write(b"\x1b\x69\x4d" + bytes(mode))
+        self.send(CommandBuilder().set_modes(mirror_printing, auto_tape_cut))
 
-    def set_media_format(self, line_count, fast=False, continuous=True, width=0x0c, length=0):
-        # Found docs on http://www.undocprint.org/formats/page_description_languages/brother_p-touch
+    def set_media_format(self, line_count, fast=False, continuous=True, width=0x0c, length=0, page=Page.STARTING):
         self.log("Setting media format...")
-        self.ser.write(b"\x1B\x69\x7A")  # Set media & quality
-
-        # 1, bit 6: Print quality: 0=fast, 1=high
-        if fast:
-            self.ser.write(bytes([0x00]))
-        else:
-            self.ser.write(bytes([0xC4]))
-
-        # 2, bit 0: Media type: 0=continuous roll, 1=pre-cut labels
-        if continuous:
-            self.ser.write(bytes([0x00]))
-            length = 0
-        else:
-            self.ser.write(bytes([0x01]))
-
-        # 3: Tape width in mm
-        self.ser.write(bytes([width]))
-
-        # 4: Label height in mm (0 for continuous roll)
-        self.ser.write(bytes([length]))
-
-        # 5 #6: Page consists of N=#5+256*#6 pixel lines
         self.log('Setting raster lines: ' + str(line_count))
-        self.ser.write(line_count.to_bytes(2, 'little'))
-
-        # Unused data bytes in the "set media and quality" command
-        self.ser.write(b"\x00\x00\x00\x00")
+        self.send(CommandBuilder().set_media_format(line_count, fast, continuous, width, length, page))
 
     def set_print_chaining(self, enabled=False):
-        b = 0
-        if enabled:
-            b = 0x8
-
-        # Set print chaining off (0x8) or on (0x0)
-        self.ser.write(bytes([0x1B, 0x69, 0x4B, b]))
+        self.send(CommandBuilder().set_print_chaining(enabled))
 
     # Set margin amount (feed amount)
     def set_margin(self, margin=0):
-        self.ser.write(bytes([0x1b, 0x69, 0x64, margin & 0xff, (margin >> 8) & 0xff]))
+        self.send(CommandBuilder().set_margin(margin))
 
-    # Set expanded mode
+    # Set expanded mode, see CommandBuilder.set_expanded_mode for the meaning of the flags
     def set_expanded_mode(self, half_cut=False, chain_print=False,
                           label_end_cut=False, high_res_print=False, clear_buf=True):
-        mode = 0
-
-        # Bit 2 Half cut (multiple half cut)
-        #  Half cut is effective only with laminated tape.
-        if half_cut:
-            mode |= (1 << 2)
-
-        # Bit 3 No chain printing (inverted)
-        # When printing multiple copies, the labels are fed after the last one is printed.
-        # ON: No chain printing (feeding and cutting the last label); default
-        # OFF:Chain printing (no feeding and cutting of the last label)
-        if not chain_print:
-            mode |= (1 << 3)
-
-        # Bit 5 Label end cut
-        # When printing multiple copies, the end of the last label is cut.
-        # ON: Cutting the end of the label
-        # OFF:No cutting the end of the label
-        if label_end_cut:
-            mode |= (1 << 5)
-
-        # Bit 6 High-resolution printing
-        # ON: High-resolution printing (360 dpi × 720 dpi)
-        # OFF:Normal printing (360 dpi × 360 dpi)
-        if high_res_print:
-            mode |= (1 << 6)
-
-        # Bit7 No buffer clearing when printing (inverted)
-        # Copy printing function
-        # The expansion buffer of the P-touch is not cleared with the “no buffer clearing when printing” command.
-        # If this command is sent when the data of the first label is printed (it is specified between the “initialize”
-        # command and the print data), printing is possible only if a print command is sent with the second or later
-        # label. However, this is possible only when printing extremely small labels.
-        if not clear_buf:
-            mode |= (1 << 7)
-
-        self.ser.write(bytes([0x1B, 0x69, 0x4B, mode]))
+        self.send(CommandBuilder().set_expanded_mode(half_cut, chain_print, label_end_cut, high_res_print, clear_buf))
 
-    def print_label(self, data: bytearray):
+    def prepare(self):
+        """ Query the printer status, once per connection """
         ser = self.ser
 
-        print('Input:', ser.in_waiting)
-        print('Output:', ser.out_waiting)
+        log.debug(f'Input: {ser.in_waiting}, Output: {ser.out_waiting}')
         ser.reset_input_buffer()
 
         self.log('Using serial device: ' + ser.name)
 
-        self.set_graphics_mode()
-
-        self.initialize()
-
-        status_raw = self.query_status()
-        self.print_status(status_raw)
-
-        self.log("Flushing print buffer...")
-        for i in range(64):
-            ser.write(b"\x00")
-
-        self.initialize()
+        self.log("Entering raster graphics (PTCBP) mode and querying status...")
+        self.send(CommandBuilder().set_graphics_mode().initialize().query_status())
+        self.print_status(ser.read(size=32))
 
-        self.set_graphics_mode(Mode.PTCBP)
+        self.prepared = True
 
-        self.set_media_format(int(len(data) / 16), width=0xc0, length=0)
+    def print_label(self, data: bytearray):
+        """ Print a single label
 
-        self.config.apply(self.set_expanded_mode)
+        Outside of a session the connection is closed afterwards. Within one, only the first label pays for the status
+        query and buffer flush.
+        """
+        self.print_job([data])
 
-        # Set no mirror, no auto tape cut
-        self.config.apply(self.set_modes)
+    def print_job(self, pages: List[bytearray]):
+        """ Print several labels in a single transmission
 
-        self.config.apply(self.set_margin)
+        Every page but the last ends with a print command without feeding, so the printer keeps going without waiting
+        for the host. Whether the last page is fed and cut is controlled by the chain_print and half_cut settings.
+        """
+        job = CommandBuilder()
+        if not self.prepared:
+            self.prepare()
+            self.log("Flushing print buffer...")
+            job.invalidate(64)
 
-        # Set compression mode: TIFF
-        ser.write(b"\x4D\x02")
+        job.print_job(pages, self.config)
 
-        # Send image data
-        self.log("Sending image data")
-        ser.write(encode_raster_transfer(data))
+        self.log("Sending print job")
+        self.send(job)
         self.log("Done")
 
-        # Print and feed
-        ser.write(b"\x1A")
-
-        # Dump status that the printer returns
-        self.print_status(ser.read(size=32))
-
-        # Initialize
-        ser.write(b"\x1b\x40")
+        # Dump the status that the printer returns for every page
+        for _ in pages:
+            self.print_status(self.ser.read(size=32))
 
-        ser.close()
+        if not self.in_session:
+            self.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,266 @@
+"""
+Non-blocking printer I/O on the asyncio event loop
+
+Connections wait for the device file descriptor to become readable/writable on
+the running loop (the qasync loop in the GUI), so many print jobs and status
+reads can share one thread. Streams without a usable file descriptor fall back
+to running the blocking calls in the loop's default executor.
+"""
+from __future__ import annotations
+
+import abc
+import asyncio
+import errno
+import logging
+import os
+from typing import AsyncIterator, List, Optional
+
+from .commands import CommandBuilder
+from .config import LabelMakerConfig
+from .status import Status
+
+STATUS_SIZE = 32
+
+# Seconds to wait for a status reply, same as the serial device timeout
+READ_TIMEOUT = 10
+
+log = logging.getLogger(__name__)
+
+_WOULD_BLOCK = (errno.EAGAIN, errno.EWOULDBLOCK)
+
+
+class AsyncConnection(abc.ABC):
+    """ A printer connection that is written to and read from without blocking the event loop """
+
+    @abc.abstractmethod
+    async def write(self, data) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def read(self, size: int, timeout: float = READ_TIMEOUT) -> bytes:
+        """ Read `size` bytes, or whatever has arrived when `timeout` runs out """
+        pass
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class FileDescriptorConnection(AsyncConnection, abc.ABC):
+    """ Drives a non-blocking file descriptor using the event loop's reader/writer callbacks """
+
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    @abc.abstractmethod
+    def write_some(self, data: memoryview) -> int:
+        """ Write as much of `data` as possible without blocking and return the number of bytes written """
+        pass
+
+    @abc.abstractmethod
+    def read_some(self, size: int) -> bytes:
+        """ Read up to `size` bytes without blocking """
+        pass
+
+    async def _wait(self, add, remove):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        add(self.fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            remove(self.fd)
+
+    async def write(self, data) -> None:
+        loop = asyncio.get_running_loop()
+        view = memoryview(data).cast('B')
+        while len(view) > 0:
+            view = view[self.write_some(view):]
+            if len(view) > 0:
+                await self._wait(loop.add_writer, loop.remove_writer)
+
+    async def read(self, size: int, timeout: float = READ_TIMEOUT) -> bytes:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.read_some(size - len(buf))
+            if len(chunk) > 0:
+                buf.extend(chunk)
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._wait(loop.add_reader, loop.remove_reader), remaining)
+            except asyncio.TimeoutError:
+                break
+        return bytes(buf)
+
+
+class SerialConnection(FileDescriptorConnection):
+    """ A pyserial port opened in non-blocking mode (POSIX only) """
+
+    def __init__(self, serial):
+        super().__init__(serial.fd)
+        self.serial = serial
+
+    def write_some(self, data: memoryview) -> int:
+        try:
+            return os.write(self.fd, data)
+        except BlockingIOError:
+            return 0
+
+    def read_some(self, size: int) -> bytes:
+        try:
+            return os.read(self.fd, size)
+        except BlockingIOError:
+            return b''
+
+    def close(self) -> None:
+        self.serial.close()
+
+
+class SocketConnection(FileDescriptorConnection):
+    """ A socket like object (e.g. a Bluetooth RFCOMM socket) with send/recv """
+
+    def __init__(self, sock):
+        sock.setblocking(False)
+        super().__init__(sock.fileno())
+        self.sock = sock
+
+    def write_some(self, data: memoryview) -> int:
+        try:
+            return self.sock.send(data)
+        except OSError as x:
+            if x.errno in _WOULD_BLOCK:
+                return 0
+            raise
+
+    def read_some(self, size: int) -> bytes:
+        try:
+            return self.sock.recv(size)
+        except OSError as x:
+            if x.errno in _WOULD_BLOCK:
+                return b''
+            raise
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class ExecutorConnection(AsyncConnection):
+    """ Fallback for blocking streams without a pollable file descriptor, e.g. serial ports on Windows """
+
+    def __init__(self, stream):
+        self.stream = stream
+        # A read that timed out, it keeps running in the executor
+        self.pending: Optional[asyncio.Future] = None
+
+    async def write(self, data) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.stream.write, bytes(data))
+
+    async def read(self, size: int, timeout: float = READ_TIMEOUT) -> bytes:
+        """ Read `size` bytes within `timeout`, or within the stream's own timeout if that is shorter
+
+        A blocking read can not be interrupted, so when `timeout` runs out first the read goes on and the next read
+        returns what it got.
+        """
+        if self.pending is None:
+            self.pending = asyncio.get_running_loop().run_in_executor(None, self.stream.read, size)
+        try:
+            data = await asyncio.wait_for(asyncio.shield(self.pending), timeout)
+        except asyncio.TimeoutError:
+            return b''
+        self.pending = None
+        return data
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+class AsyncLabelMaker:
+    """ Asyncio counterpart of LabelMaker
+
+    Commands and their replies are serialized per connection, so status polling and printing can run concurrently on
+    the same printer.
+    """
+
+    def log(self, m: str):
+        log.info(m)
+
+    def __init__(self, connection: AsyncConnection, config: Optional[LabelMakerConfig] = None):
+        self.config = config
+        if config is None:
+            self.config = LabelMakerConfig()
+
+        self.connection = connection
+        self.prepared = False
+        self.lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, device, config: Optional[LabelMakerConfig] = None) -> AsyncLabelMaker:
+        """ Open the connection to a PrinterDevice """
+        log.info('Opening printer device connection...')
+        return cls(await device.open_async(), config)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self.prepared:
+            async with self.lock:
+                await self.send(CommandBuilder().initialize())
+            self.prepared = False
+        self.connection.close()
+
+    async def send(self, commands: CommandBuilder):
+        for chunk in commands.chunks():
+            await self.connection.write(chunk)
+
+    async def read_status(self) -> Status:
+        s = Status(await self.connection.read(STATUS_SIZE))
+        self.log(str(s))
+        return s
+
+    async def query_status(self) -> Status:
+        async with self.lock:
+            self.log("Query status...")
+            await self.send(CommandBuilder().query_status())
+            return await self.read_status()
+
+    async def poll_status(self, interval: float = 1.0) -> AsyncIterator[Status]:
+        """ Query the status every `interval` seconds for as long as the caller keeps iterating """
+        while True:
+            yield await self.query_status()
+            await asyncio.sleep(interval)
+
+    async def prepare(self):
+        """ Query the printer status, once per connection """
+        self.log("Entering raster graphics (PTCBP) mode and querying status...")
+        await self.send(CommandBuilder().set_graphics_mode().initialize().query_status())
+        await self.read_status()
+        self.prepared = True
+
+    async def print_label(self, data: bytearray) -> List[Status]:
+        return await self.print_job([data])
+
+    async def print_job(self, pages: List[bytearray]) -> List[Status]:
+        """ Print several labels in a single transmission, see LabelMaker.print_job """
+        async with self.lock:
+            job = CommandBuilder()
+            if not self.prepared:
+                await self.prepare()
+                self.log("Flushing print buffer...")
+                job.invalidate(64)
+
+            job.print_job(pages, self.config)
+
+            self.log("Sending print job")
+            await self.send(job)
+            self.log("Done")
+
+            return [await self.read_status() for _ in pages]
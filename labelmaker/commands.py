@@ -0,0 +1,221 @@
+import logging
+from typing import Iterator, List, Tuple, Union
+
+from .config import LabelMakerConfig
+from .encode import iter_raster_transfer_blocks, RASTER_LINE_SIZE
+from .format import Mode, Page
+
+log = logging.getLogger(__name__)
+
+# Largest chunk handed to a single write
+DEFAULT_CHUNK_SIZE = 4096
+
+
+class CommandBuilder:
+    """ Assembles printer commands into a few large buffers
+
+    Every command is appended to the builder instead of being written to the device right away, so a whole print job
+    can be sent with a minimal number of writes. Raster data is encoded lazily while the chunks are consumed.
+    """
+
+    def __init__(self):
+        # Command bytes, and raster data with its zero_lines flag that is encoded in chunks()
+        self.parts: List[Union[bytearray, Tuple[object, bool]]] = [bytearray()]
+
+    def append(self, data) -> 'CommandBuilder':
+        buf = self.parts[-1]
+        if not isinstance(buf, bytearray):
+            buf = bytearray()
+            self.parts.append(buf)
+        buf.extend(data)
+        return self
+
+    def invalidate(self, count=64) -> 'CommandBuilder':
+        # Clears out any partially received command in the print buffer
+        return self.append(bytes(count))
+
+    # The print buffer is cleared, and the arrangement position is returned to the origin on the page.
+    def initialize(self) -> 'CommandBuilder':
+        return self.append(b"\x1b\x40")
+
+    def query_status(self) -> 'CommandBuilder':
+        return self.append(b"\x1b\x69\x53")
+
+    def set_graphics_mode(self, graphics_mode=Mode.PTCBP) -> 'CommandBuilder':
+        return self.append(bytes([0x1b, 0x69, 0x61, graphics_mode]))
+
+    def set_modes(self, mirror_printing=False, auto_tape_cut=False) -> 'CommandBuilder':
+        mode = 0
+        if mirror_printing:
+            mode |= (1 << 7)
+        if auto_tape_cut:
+            mode |= (1 << 6)
+        return self.append(bytes([0x1b, 0x69, 0x4d, mode]))
+
+    def set_media_format(self, line_count, fast=False, continuous=True, width=0x0c, length=0,
+                         page=Page.STARTING) -> 'CommandBuilder':
+        # Found docs on http://www.undocprint.org/formats/page_description_languages/brother_p-touch
+        # Set media & quality
+        cmd = bytearray(b"\x1B\x69\x7A")
+
+        # 1, bit 6: Print quality: 0=fast, 1=high
+        cmd.append(0x00 if fast else 0xC4)
+
+        # 2, bit 0: Media type: 0=continuous roll, 1=pre-cut labels
+        if continuous:
+            cmd.append(0x00)
+            length = 0
+        else:
+            cmd.append(0x01)
+
+        # 3: Tape width in mm
+        cmd.append(width)
+
+        # 4: Label height in mm (0 for continuous roll)
+        cmd.append(length)
+
+        # 5 #6: Page consists of N=#5+256*#6 pixel lines
+        cmd.extend(line_count.to_bytes(2, 'little'))
+
+        # 7 #8: Unused upper bytes of the raster line count
+        cmd.extend(b"\x00\x00")
+
+        # 9: Page within a multi page job: 0=starting page, 1=other pages, 2=last page
+        cmd.append(page)
+
+        # 10: Unused data byte in the "set media and quality" command
+        cmd.append(0x00)
+
+        return self.append(cmd)
+
+    def set_print_chaining(self, enabled=False) -> 'CommandBuilder':
+        b = 0
+        if enabled:
+            b = 0x8
+
+        # Set print chaining off (0x8) or on (0x0)
+        return self.append(bytes([0x1B, 0x69, 0x4B, b]))
+
+    # Set margin amount (feed amount)
+    def set_margin(self, margin=0) -> 'CommandBuilder':
+        return self.append(bytes([0x1b, 0x69, 0x64, margin & 0xff, (margin >> 8) & 0xff]))
+
+    # Set expanded mode
+    def set_expanded_mode(self, half_cut=False, chain_print=False,
+                          label_end_cut=False, high_res_print=False, clear_buf=True) -> 'CommandBuilder':
+        mode = 0
+
+        # Bit 2 Half cut (multiple half cut)
+        #  Half cut is effective only with laminated tape.
+        if half_cut:
+            mode |= (1 << 2)
+
+        # Bit 3 No chain printing (inverted)
+        # When printing multiple copies, the labels are fed after the last one is printed.
+        # ON: No chain printing (feeding and cutting the last label); default
+        # OFF:Chain printing (no feeding and cutting of the last label)
+        if not chain_print:
+            mode |= (1 << 3)
+
+        # Bit 5 Label end cut
+        # When printing multiple copies, the end of the last label is cut.
+        # ON: Cutting the end of the label
+        # OFF:No cutting the end of the label
+        if label_end_cut:
+            mode |= (1 << 5)
+
+        # Bit 6 High-resolution printing
+        # ON: High-resolution printing (360 dpi × 720 dpi)
+        # OFF:Normal printing (360 dpi × 360 dpi)
+        if high_res_print:
+            mode |= (1 << 6)
+
+        # Bit7 No buffer clearing when printing (inverted)
+        # Copy printing function
+        # The expansion buffer of the P-touch is not cleared with the “no buffer clearing when printing” command.
+        # If this command is sent when the data of the first label is printed (it is specified between the “initialize”
+        # command and the print data), printing is possible only if a print command is sent with the second or later
+        # label. However, this is possible only when printing extremely small labels.
+        if not clear_buf:
+            mode |= (1 << 7)
+
+        return self.append(bytes([0x1B, 0x69, 0x4B, mode]))
+
+    # Set compression mode: TIFF
+    def set_compression(self) -> 'CommandBuilder':
+        return self.append(b"\x4D\x02")
+
+    def raster(self, data, zero_lines=True) -> 'CommandBuilder':
+        """ Add the raster transfer frames for 1 bit per pixel image data, encoded when the chunks are consumed """
+        self.parts.append((data, zero_lines))
+        return self
+
+    # Print without feeding, used for all but the last page
+    def print_page(self) -> 'CommandBuilder':
+        return self.append(b"\x0C")
+
+    # Print and feed
+    def print_and_feed(self) -> 'CommandBuilder':
+        return self.append(b"\x1A")
+
+    def print_job(self, pages: List[bytearray], config: LabelMakerConfig) -> 'CommandBuilder':
+        """ Add the commands to print every page of 1 bit per pixel image data in `pages` as a single job """
+
+        # Initializing clears all settings, so they are sent again for every job
+        self.initialize().set_graphics_mode(Mode.PTCBP)
+
+        for index, data in enumerate(pages):
+            last = index == len(pages) - 1
+            if index == 0:
+                page = Page.STARTING
+            elif last:
+                page = Page.LAST
+            else:
+                page = Page.OTHER
+
+            line_count = int(len(data) / RASTER_LINE_SIZE)
+            log.info(f'Page {index + 1} of {len(pages)}, raster lines: {line_count}')
+            self.set_media_format(line_count, width=0xc0, length=0, page=page)
+
+            config.apply(self.set_expanded_mode)
+
+            # Set no mirror, no auto tape cut
+            config.apply(self.set_modes)
+
+            config.apply(self.set_margin)
+
+            self.set_compression()
+
+            # Image data, encoded while it is being sent
+            self.raster(data, zero_lines=config.zero_raster_lines)
+
+            if last:
+                self.print_and_feed()
+            else:
+                self.print_page()
+
+        return self
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """ Yield the commands as consecutive chunks of at most `chunk_size` bytes
+
+        The raster data is encoded again on every call, so the chunks can be consumed more than once.
+        """
+        pending = bytearray()
+        for part in self.parts:
+            if isinstance(part, bytearray):
+                pieces = [part]
+            else:
+                data, zero_lines = part
+                pieces = (frames for frames, _ in iter_raster_transfer_blocks(data, RASTER_LINE_SIZE,
+                                                                              zero_lines=zero_lines))
+            for piece in pieces:
+                pending.extend(piece)
+                while len(pending) >= chunk_size:
+                    yield bytes(pending[:chunk_size])
+                    del pending[:chunk_size]
+        if len(pending) > 0:
+            yield bytes(pending)
+
+    def build(self) -> bytes:
+        return b''.join(self.chunks())
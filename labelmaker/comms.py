@@ -6,9 +6,12 @@ from typing import *
 from util import *
 
 import abc
-import serial
-import bluetooth
-from serial.tools.list_ports_common import ListPortInfo
+
+# The backends (and asyncio) are only imported once a device of their kind is used, which keeps them out of the startup
+# of the CLI and off the machines that do not have them
+if TYPE_CHECKING:
+    from serial.tools.list_ports_common import ListPortInfo
+    from .aio import AsyncConnection
 
 BluetoothDeviceInfo = Tuple[str, str, str]
 
@@ -17,6 +20,7 @@ log = logging.getLogger(__name__)
 
 class PrinterDevice(abc.ABC):
     def __init__(self, name):
+        import serial
         self.name = name
         self.baudrate = 9600
         self.stopbits = serial.STOPBITS_ONE
@@ -27,6 +31,13 @@ class PrinterDevice(abc.ABC):
     def open(self):
         pass
 
+    async def open_async(self) -> AsyncConnection:
+        """ Open the device for use with AsyncLabelMaker, by default running the blocking open() in the executor """
+        import asyncio
+        from .aio import ExecutorConnection
+        stream = await asyncio.get_running_loop().run_in_executor(None, self.open)
+        return ExecutorConnection(stream)
+
     @classmethod
     @abc.abstractmethod
     async def list_devices(cls) -> List[Tuple[str, PrinterDevice]]:
@@ -42,12 +53,14 @@ class BluetoothPrinterDevice(PrinterDevice):
 
     @classmethod
     async def list_devices(cls) -> List[Tuple[str, PrinterDevice]]:
+        import bluetooth
         devices = bluetooth.discover_devices(1, flush_cache=False, lookup_names=True, lookup_class=True)
 
         return [(name if not None else address, BluetoothPrinterDevice(address, service)) for address, name, service in
                 devices]
 
     def test(self):
+        import bluetooth
         log.info(f'Scanning {self.address} for services...')
         service_matches = bluetooth.find_service(address=self.address)
 
@@ -58,6 +71,7 @@ class BluetoothPrinterDevice(PrinterDevice):
         host = first_match["host"]
 
     def open(self):
+        import bluetooth
         service_matches = bluetooth.find_service(address=self.address)
 
         first_match = service_matches[0]
@@ -70,6 +84,13 @@ class BluetoothPrinterDevice(PrinterDevice):
         socket.connect((host, port))
         return socket
 
+    async def open_async(self) -> AsyncConnection:
+        import asyncio
+        from .aio import SocketConnection
+        # Service discovery and connecting block, the socket is non-blocking once connected
+        socket = await asyncio.get_running_loop().run_in_executor(None, self.open)
+        return SocketConnection(socket)
+
 
 class SerialPrinterDevice(PrinterDevice):
 
@@ -80,6 +101,7 @@ class SerialPrinterDevice(PrinterDevice):
         self.port_info = port_info
 
     def open(self):
+        import serial
         return serial.Serial(
             self.port_info.device,
             baudrate=self.baudrate,
@@ -91,6 +113,25 @@ class SerialPrinterDevice(PrinterDevice):
             dsrdtr=True
         )
 
+    async def open_async(self) -> AsyncConnection:
+        if is_win:
+            # Windows serial ports can not be polled by the event loop
+            return await super().open_async()
+
+        import serial
+        from .aio import SerialConnection
+        port = serial.Serial(
+            self.port_info.device,
+            baudrate=self.baudrate,
+            stopbits=self.stopbits,
+            parity=self.parity,
+            bytesize=8,
+            timeout=0,
+            write_timeout=0,
+            dsrdtr=True
+        )
+        return SerialConnection(port)
+
     @classmethod
     def find(cls, query: str) -> Optional[PrinterDevice]:
         for name, device in cls.list_devices():
@@ -105,6 +146,7 @@ class SerialPrinterDevice(PrinterDevice):
     @classmethod
     def list_comports(cls) -> List[ListPortInfo]:
         if is_mac:
+            from serial.tools.list_ports_common import ListPortInfo
             from serial.tools.list_ports_osx import GetIOServicesByType, GetParentDeviceByType, get_string_property
             from mac_bt import get_bytes_property, IOBluetooth
 
@@ -0,0 +1,95 @@
+"""
+PackBits ("TIFF") compression of raster lines
+
+Raster lines are encoded in bulk with NumPy. Input that does not fit the bulk
+path (lines longer than a single PackBits packet, or a trailing partial line)
+is handled by the `packbits` module, which produces identical output.
+"""
+from typing import Tuple
+
+import numpy as np
+import packbits
+
+# Longest run or literal sequence a single PackBits header can describe
+MAX_PACKET_LENGTH = 127
+
+
+def encode(data) -> bytes:
+    """ Encode data using PackBits """
+    return packbits.encode(bytes(data))
+
+
+def decode(data) -> bytes:
+    """ Decode PackBits encoded data """
+    data = bytes(data)
+    result = bytearray()
+    pos = 0
+    while pos < len(data):
+        header = data[pos]
+        pos += 1
+        if header < 128:
+            # Literal run of header + 1 bytes
+            result.extend(data[pos: pos + header + 1])
+            pos += header + 1
+        elif header > 128:
+            # Repeat the next byte 257 - header times
+            result.extend(data[pos: pos + 1] * (257 - header))
+            pos += 1
+        # 128 is a no-op
+
+    return bytes(result)
+
+
+def encode_lines(data, line_size: int, reserve: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ PackBits encode every `line_size` bytes of `data` separately, all lines at once
+
+    Each encoded line is preceded by `reserve` unused bytes that the caller can fill in with a command header.
+
+    :returns: The output buffer, the offset of every line (including its reserved bytes) in that buffer and the
+              encoded length of every line (excluding its reserved bytes).
+    """
+    if line_size > MAX_PACKET_LENGTH:
+        raise ValueError(f'Line size {line_size} is larger than {MAX_PACKET_LENGTH}')
+    if len(data) % line_size != 0:
+        raise ValueError(f'Data length {len(data)} is not a multiple of the line size {line_size}')
+
+    lines = np.frombuffer(data, dtype=np.uint8).reshape(-1, line_size)
+    line_count = lines.shape[0]
+
+    # Split every line into runs of equal bytes
+    run_start = np.ones(lines.shape, dtype=bool)
+    run_start[:, 1:] = lines[:, 1:] != lines[:, :-1]
+    run_start = run_start.ravel()
+    run_offsets = np.flatnonzero(run_start)
+    run_lengths = np.diff(np.append(run_offsets, run_start.size))
+    run_length = run_lengths[np.cumsum(run_start) - 1]
+
+    # Single bytes are grouped into literal packets, longer runs become repeat packets
+    single = (run_length == 1).reshape(lines.shape)
+    literal_start = single.copy()
+    literal_start[:, 1:] &= ~single[:, :-1]
+    single = single.ravel()
+    literal_start = literal_start.ravel()
+    literal_lengths = np.bincount((np.cumsum(literal_start) - 1)[single], minlength=np.count_nonzero(literal_start))
+
+    has_header = literal_start | (run_start & ~single)
+    # Every run writes its first byte, plus a header byte where a packet starts
+    emitted = run_start.astype(np.intp) + has_header
+    header = np.zeros(run_start.size, dtype=np.uint8)
+    header[literal_start] = literal_lengths - 1
+    repeat_start = has_header & ~single
+    header[repeat_start] = 257 - run_length[repeat_start]
+
+    line_lengths = emitted.reshape(lines.shape).sum(axis=1)
+    line_offsets = np.zeros(line_count, dtype=np.intp)
+    np.cumsum(line_lengths[:-1] + reserve, out=line_offsets[1:])
+
+    # Position of every input byte in the output, counting the reserved bytes of all lines up to and including its own
+    position = np.cumsum(emitted) - emitted
+    position += np.repeat(np.arange(1, line_count + 1, dtype=np.intp) * reserve, line_size)
+
+    out = np.zeros(int(line_offsets[-1] + reserve + line_lengths[-1]) if line_count else 0, dtype=np.uint8)
+    out[position[has_header]] = header[has_header]
+    out[position[run_start] + has_header[run_start]] = lines.ravel()[run_start]
+
+    return out, line_offsets, line_lengths
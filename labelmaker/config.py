@@ -30,6 +30,9 @@ class LabelMakerConfig:
 
     margin: int = 0
 
+    """Send blank raster lines as a single zero raster graphics command"""
+    zero_raster_lines: bool = True
+
 
     def apply(self, fun: Callable):
         available_paras = set(fun.__code__.co_varnames)
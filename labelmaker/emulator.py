@@ -0,0 +1,366 @@
+"""
+Software emulation of a PT-P300BT for use without a printer
+
+The emulator parses the raster command stream the same way the printer does,
+decodes the raster data back to the 1 bit per pixel image that was sent and
+answers status requests with 32 byte status replies. Optionally writes are
+slowed down to the throughput of a real serial connection.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import compression
+from .aio import AsyncConnection, READ_TIMEOUT
+from .comms import PrinterDevice
+from .encode import RASTER_LINE_SIZE, TRANSFER_COMMAND, ZERO_COMMAND
+from .errors import Error1, Error2
+from .format import Media, Mode, Page, Phase
+from .status import STATUS_OFFSET_BATTERY, STATUS_OFFSET_ERROR_INFO_1, STATUS_OFFSET_ERROR_INFO_2, \
+    STATUS_OFFSET_NOTIFICATION, STATUS_OFFSET_PHASE_TYPE, STATUS_OFFSET_STATUS_TYPE, STATUS_PRINT_DONE, \
+    STATUS_REPLY
+
+log = logging.getLogger(__name__)
+
+STATUS_HEADER = b'\x80\x20B0J0\x00\x00'
+STATUS_OFFSET_MEDIA_WIDTH = 10
+STATUS_OFFSET_MEDIA_TYPE = 11
+STATUS_OFFSET_MEDIA_LENGTH = 17
+
+ESC = 0x1b
+PRINT = 0x0c
+PRINT_AND_FEED = 0x1a
+COMPRESSION_COMMAND = 0x4d
+
+COMPRESSION_NONE = 0x00
+COMPRESSION_TIFF = 0x02
+
+# Bits on the line of a serial connection per byte, with one start and one stop bit
+BITS_PER_BYTE = 10
+
+# Seconds between checks for replies when reading asynchronously
+POLL_INTERVAL = 0.01
+
+
+@dataclass
+class EmulatedPage:
+    """ A page printed by the emulator """
+
+    data: bytearray
+    """ The 1 bit per pixel raster lines, as passed to LabelMaker.print_label """
+
+    line_count: int
+    """ Raster line count announced by the media format command """
+
+    page: Page
+    feed: bool
+    """ Whether the page was printed with print and feed (the last page of a job) """
+
+    settings: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def lines(self) -> int:
+        return len(self.data) // RASTER_LINE_SIZE
+
+
+class PrinterEmulator:
+    """ Parses printer commands and keeps the resulting pages and status replies
+
+    Data is fed in arbitrary pieces with `write`, commands split across writes are completed by later writes.
+    """
+
+    def __init__(self, media_width: int = 12, media_type: Media = Media.LAMINATED, battery: int = 0):
+        self.media_width = media_width
+        self.media_type = media_type
+        self.battery = battery
+
+        self.pages: List[EmulatedPage] = []
+        self.replies = bytearray()
+        self.pending = bytearray()
+        self.bytes_received = 0
+        self.commands_received = 0
+        self.error2 = Error2.ERROR2_NONE
+
+        self.initialize()
+
+        self.handlers: Dict[int, Callable[[], Optional[int]]] = {
+            0x00: lambda: 1,
+            ESC: self.parse_escape,
+            COMPRESSION_COMMAND: self.parse_compression,
+            TRANSFER_COMMAND: self.parse_transfer,
+            ZERO_COMMAND: self.parse_zero,
+            PRINT: lambda: self.print_page(feed=False),
+            PRINT_AND_FEED: lambda: self.print_page(feed=True),
+        }
+
+    def initialize(self):
+        self.mode: Optional[int] = None
+        self.compression = COMPRESSION_NONE
+        self.line_count = 0
+        self.page = Page.STARTING
+        self.settings: Dict[str, int] = {}
+        self.raster = bytearray()
+
+    def write(self, data) -> int:
+        self.bytes_received += len(data)
+        self.pending.extend(data)
+
+        pos = 0
+        while pos < len(self.pending):
+            handler = self.handlers.get(self.pending[pos])
+            if handler is None:
+                log.warning(f'Unknown command 0x{self.pending[pos]:02x}')
+                self.error2 = Error2.ERROR2_TRANS_ERROR
+                pos += 1
+                continue
+
+            self.cursor = pos
+            length = handler()
+            if length is None:
+                # Incomplete, wait for the rest of the command
+                break
+            pos += length
+            self.commands_received += 1
+
+        del self.pending[:pos]
+        return len(data)
+
+    def read(self, size: int) -> bytes:
+        result = bytes(self.replies[:size])
+        del self.replies[:size]
+        return result
+
+    def param(self, offset: int, count: int = 1) -> Optional[bytes]:
+        """ Bytes following the command currently being parsed, or None if they have not all arrived yet """
+        start = self.cursor + offset
+        if start + count > len(self.pending):
+            return None
+        return bytes(self.pending[start:start + count])
+
+    def parse_escape(self) -> Optional[int]:
+        command = self.param(1)
+        if command is None:
+            return None
+
+        if command == b'@':
+            self.initialize()
+            return 2
+
+        if command != b'i':
+            log.warning(f'Unknown command ESC {command}')
+            self.error2 = Error2.ERROR2_TRANS_ERROR
+            return 2
+
+        sub = self.param(2)
+        if sub is None:
+            return None
+
+        # Sub command and the number of parameter bytes following it
+        lengths: Dict[bytes, int] = {b'S': 0, b'a': 1, b'z': 10, b'K': 1, b'M': 1, b'd': 2, b'A': 1}
+        if sub not in lengths:
+            log.warning(f'Unknown command ESC i {sub}')
+            self.error2 = Error2.ERROR2_TRANS_ERROR
+            return 3
+
+        params = self.param(3, lengths[sub])
+        if params is None:
+            return None
+
+        if sub == b'S':
+            self.reply(STATUS_REPLY)
+        elif sub == b'a':
+            self.mode = params[0]
+        elif sub == b'z':
+            self.line_count = int.from_bytes(params[4:8], 'little')
+            try:
+                self.page = Page(params[8])
+            except ValueError:
+                log.warning(f'Unknown page {params[8]} in ESC i z')
+                self.error2 = Error2.ERROR2_TRANS_ERROR
+            self.settings['quality'] = params[0]
+            self.settings['media_type'] = params[1]
+            self.settings['width'] = params[2]
+            self.settings['length'] = params[3]
+        elif sub == b'K':
+            self.settings['expanded_mode'] = params[0]
+        elif sub == b'M':
+            self.settings['mode'] = params[0]
+        elif sub == b'd':
+            self.settings['margin'] = int.from_bytes(params, 'little')
+        elif sub == b'A':
+            self.settings['cut_each'] = params[0]
+
+        return 3 + len(params)
+
+    def parse_compression(self) -> Optional[int]:
+        params = self.param(1)
+        if params is None:
+            return None
+        self.compression = params[0]
+        return 2
+
+    def parse_transfer(self) -> Optional[int]:
+        params = self.param(1, 2)
+        if params is None:
+            return None
+        size = int.from_bytes(params, 'little')
+        data = self.param(3, size)
+        if data is None:
+            return None
+
+        if self.compression == COMPRESSION_TIFF:
+            data = compression.decode(data)
+        if len(data) != RASTER_LINE_SIZE:
+            log.warning(f'Raster line of {len(data)} bytes, expected {RASTER_LINE_SIZE}')
+            self.error2 = Error2.ERROR2_TRANS_ERROR
+        self.raster.extend(data)
+        return 3 + size
+
+    def parse_zero(self) -> int:
+        self.raster.extend(bytes(RASTER_LINE_SIZE))
+        return 1
+
+    def print_page(self, feed: bool) -> int:
+        if self.mode != Mode.PTCBP:
+            log.warning('Printing without raster graphics mode')
+            self.error2 = Error2.ERROR2_TRANS_ERROR
+
+        page = EmulatedPage(self.raster, self.line_count, self.page, feed, dict(self.settings))
+        if page.lines != page.line_count:
+            log.warning(f'Received {page.lines} raster lines, announced {page.line_count}')
+        self.pages.append(page)
+
+        # The buffer is cleared for the next page, the settings are kept
+        self.raster = bytearray()
+        self.reply(STATUS_PRINT_DONE)
+        return 1
+
+    def status(self, status_type: int) -> bytes:
+        raw = bytearray(32)
+        raw[:len(STATUS_HEADER)] = STATUS_HEADER
+        raw[STATUS_OFFSET_BATTERY] = self.battery
+        raw[STATUS_OFFSET_ERROR_INFO_1] = Error1.ERROR1_NONE.value
+        raw[STATUS_OFFSET_ERROR_INFO_2] = self.error2.value
+        raw[STATUS_OFFSET_MEDIA_WIDTH] = self.media_width
+        raw[STATUS_OFFSET_MEDIA_TYPE] = self.media_type
+        raw[STATUS_OFFSET_MEDIA_LENGTH] = 0
+        raw[STATUS_OFFSET_STATUS_TYPE] = status_type
+        raw[STATUS_OFFSET_PHASE_TYPE] = Phase.RECEIVING
+        raw[STATUS_OFFSET_NOTIFICATION] = 0
+        return bytes(raw)
+
+    def reply(self, status_type: int):
+        self.replies.extend(self.status(status_type))
+
+
+class EmulatedSerial:
+    """ The subset of the serial.Serial interface that LabelMaker uses, connected to a PrinterEmulator """
+
+    def __init__(self, emulator: PrinterEmulator, name: str, baudrate: Optional[int] = None):
+        self.emulator = emulator
+        self.name = name
+        self.baudrate = baudrate
+        self.busy_until = 0.0
+        self.bytes_written = 0
+        self.write_count = 0
+        self.is_open = True
+        self.lock = threading.Lock()
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self.emulator.replies)
+
+    @property
+    def out_waiting(self) -> int:
+        return 0
+
+    def reset_input_buffer(self):
+        self.emulator.replies.clear()
+
+    def throttle(self, size: int):
+        """ Block for as long as sending `size` bytes takes at the configured baud rate """
+        if self.baudrate is None:
+            return
+        now = time.perf_counter()
+        self.busy_until = max(now, self.busy_until) + size * BITS_PER_BYTE / self.baudrate
+        time.sleep(max(0.0, self.busy_until - now))
+
+    def write(self, data) -> int:
+        self.throttle(len(data))
+        with self.lock:
+            self.bytes_written += len(data)
+            self.write_count += 1
+            return self.emulator.write(data)
+
+    def read(self, size: int = 1) -> bytes:
+        with self.lock:
+            return self.emulator.read(size)
+
+    def close(self):
+        self.is_open = False
+
+
+class EmulatedAsyncConnection(AsyncConnection):
+    """ An AsyncConnection to a PrinterEmulator, for use with AsyncLabelMaker
+
+    Reads poll for replies on the event loop until enough have arrived or the timeout runs out, like a printer that
+    does not answer.
+    """
+
+    def __init__(self, serial: EmulatedSerial):
+        self.serial = serial
+
+    async def write(self, data) -> None:
+        if self.serial.baudrate is None:
+            self.serial.write(data)
+        else:
+            # Throttled writes sleep
+            await asyncio.get_running_loop().run_in_executor(None, self.serial.write, bytes(data))
+
+    async def read(self, size: int, timeout: float = READ_TIMEOUT) -> bytes:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        buf = bytearray()
+        while True:
+            buf.extend(self.serial.read(size - len(buf)))
+            remaining = deadline - loop.time()
+            if len(buf) >= size or remaining <= 0:
+                break
+            await asyncio.sleep(min(POLL_INTERVAL, remaining))
+        return bytes(buf)
+
+    def close(self) -> None:
+        self.serial.close()
+
+
+class EmulatedPrinterDevice(PrinterDevice):
+    """ A PrinterDevice backed by a PrinterEmulator instead of a physical printer
+
+    The emulator is kept across connections, so the printed pages can be inspected after LabelMaker closed the
+    connection. With `throttle` set, writes take as long as they would over a serial connection at `baudrate`.
+    """
+
+    def __init__(self, name: str = 'PT-P300BT emulator', throttle: bool = False,
+                 emulator: Optional[PrinterEmulator] = None):
+        super().__init__(name)
+        self.throttle = throttle
+        self.emulator = emulator if emulator is not None else PrinterEmulator()
+        self.connections: List[EmulatedSerial] = []
+
+    def open(self) -> EmulatedSerial:
+        connection = EmulatedSerial(self.emulator, self.name, self.baudrate if self.throttle else None)
+        self.connections.append(connection)
+        return connection
+
+    async def open_async(self) -> EmulatedAsyncConnection:
+        return EmulatedAsyncConnection(self.open())
+
+    @classmethod
+    async def list_devices(cls) -> List[Tuple[str, EmulatedPrinterDevice]]:
+        device = cls()
+        return [(device.name, device)]
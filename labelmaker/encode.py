@@ -1,10 +1,21 @@
-import packbits
-import png
+import numpy as np
 import struct
 
+from . import compression
+
 # "Raster graphics transfer" serial command
 TRANSFER_COMMAND = 0x47
 
+# "Zero raster graphics" serial command, sent instead of a transfer for a blank line
+ZERO_COMMAND = 0x5A
+
+# Send in chunks of 1 line (128px @ 1bpp = 16 bytes)
+# This mirrors the official app from Brother. Other values haven't been tested.
+RASTER_LINE_SIZE = 16
+
+# Number of lines encoded at once when streaming
+RASTER_BLOCK_LINES = 256
+
 unsigned_char = struct.Struct('B')
 
 
@@ -13,36 +24,69 @@ def as_unsigned_char(byte):
     return unsigned_char.unpack(byte)[0]
 
 
-def encode_raster_transfer(data):
-    """ Encode 1 bit per pixel image data for transfer over serial to the printer """
-    buf = bytearray()
+def iter_raster_transfer_blocks(data, chunk_size=RASTER_LINE_SIZE, block_lines=RASTER_BLOCK_LINES, zero_lines=True):
+    """ Encode 1 bit per pixel image data `block_lines` lines at a time
 
-    # Send in chunks of 1 line (128px @ 1bpp = 16 bytes)
-    # This mirrors the official app from Brother. Other values haven't been tested.
-    chunk_size = 16
-
-    for i in range(0, len(data), chunk_size):
-        chunk = data[i: i + chunk_size]
+    Yields the encoded transfer frames of each block as one buffer, together with the offsets of the frames in it
+    (and the end offset of the last frame). If `zero_lines` is set, blank lines are sent as a single zero raster
+    graphics command.
+    """
+    view = memoryview(data).cast('B')
+    block_size = chunk_size * block_lines
+
+    if chunk_size > compression.MAX_PACKET_LENGTH:
+        bulk_size = 0
+    else:
+        bulk_size = len(view) - len(view) % chunk_size
+
+    for i in range(0, bulk_size, block_size):
+        frames, offsets, lengths = compression.encode_lines(view[i: min(i + block_size, bulk_size)], chunk_size, 3)
+
+        # Header and number of bytes to transfer (n1 + n2*256)
+        frames[offsets] = TRANSFER_COMMAND
+        frames[offsets + 1] = lengths & 0xff
+        frames[offsets + 2] = lengths >> 8
+
+        if zero_lines:
+            # A blank line always packs into the two bytes of a single repeat of 0x00
+            blank = np.flatnonzero((lengths == 2) & (frames[offsets + 3] == 257 - chunk_size) & (frames[offsets + 4] == 0))
+            if len(blank) > 0:
+                frames[offsets[blank]] = ZERO_COMMAND
+                keep = np.ones(len(frames), dtype=bool)
+                keep[offsets[blank, np.newaxis] + np.arange(1, 5)] = False
+                frames = frames[keep]
+
+                frame_sizes = lengths + 3
+                frame_sizes[blank] = 1
+                offsets[1:] = np.cumsum(frame_sizes[:-1])
+
+        yield memoryview(frames), offsets.tolist() + [len(frames)]
+
+    for i in range(bulk_size, len(view), chunk_size):
+        packed_chunk = compression.encode(view[i: i + chunk_size])
+        length = len(packed_chunk)
+        frame = bytes((TRANSFER_COMMAND, length & 0xff, length >> 8)) + packed_chunk
+        yield memoryview(frame), [0, len(frame)]
 
-        # Encode as tiff
-        packed_chunk = packbits.encode(chunk)
 
-        # Write header
-        buf.append(TRANSFER_COMMAND)
+def iter_raster_transfer(data, chunk_size=RASTER_LINE_SIZE, block_lines=RASTER_BLOCK_LINES, zero_lines=True):
+    """ Yield ready-to-send raster transfer frames for 1 bit per pixel image data
 
-        # Write number of bytes to transfer (n1 + n2*256)
-        length = len(packed_chunk)
-        buf.append(int(length % 256))
-        buf.append(int(length / 256))
+    Frames are memoryview slices produced lazily, `block_lines` lines at a time, so the first frame can be sent before
+    the rest of the image has been encoded.
+    """
+    for frames, offsets in iter_raster_transfer_blocks(data, chunk_size, block_lines, zero_lines):
+        for start, end in zip(offsets, offsets[1:]):
+            yield frames[start: end]
 
-        # Write data
-        buf.extend(packed_chunk)
 
-    return buf
+def encode_raster_transfer(data, zero_lines=True):
+    """ Encode 1 bit per pixel image data for transfer over serial to the printer """
+    return bytearray(b''.join(frames for frames, _ in iter_raster_transfer_blocks(data, zero_lines=zero_lines)))
 
 
 def decode_raster_transfer(data):
-    """ Read data encoded as T encoded as TIFF with transfer headers """
+    """ Read data encoded as TIFF with transfer headers and return the raw 1 bit per pixel image data """
 
     buf = bytearray()
     i = 0
@@ -50,21 +94,26 @@ def decode_raster_transfer(data):
     while i < len(data):
         if data[i] == TRANSFER_COMMAND:
             # Decode number of bytes to transfer
-            n1 = as_unsigned_char(data[i + 1])
-            n2 = as_unsigned_char(data[i + 2])
+            n1 = data[i + 1]
+            n2 = data[i + 2]
             num_bytes = n1 + n2 * 256
 
-            # Copy contents of transfer to output buffer
+            # Unpack contents of transfer to output buffer
             transferred_data = data[i + 3: i + 3 + num_bytes]
-            buf.extend(transferred_data)
 
             # Confirm
             if len(transferred_data) != num_bytes:
                 raise Exception("Failed to read %d bytes at index %s: end of input data reached." % (num_bytes, i))
 
+            buf.extend(compression.decode(transferred_data))
+
             # Shift to the next position after these command and data bytes
             i = i + 3 + num_bytes
 
+        elif data[i] == ZERO_COMMAND:
+            buf.extend(bytes(RASTER_LINE_SIZE))
+            i = i + 1
+
         else:
             raise Exception("Unexpected byte %s" % data[i])
 
@@ -77,6 +126,7 @@ def read_png(path):
     This should work with any 8 bit PNG. To ensure compatibility, the image can
     be processed with Imagemagick first using the -monochrome flag.
     """
+    import png
 
     buf = bytearray()
 
@@ -10,6 +10,13 @@ class Mode(IntEnum):
     PTCBP = 1
 
 
+class Page(IntEnum):
+    """Position of a page within a multi page print job"""
+    STARTING = 0
+    OTHER = 1
+    LAST = 2
+
+
 class Media(IntEnum):
     UNKNOWN = 0x00
 
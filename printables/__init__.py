@@ -1,5 +1,33 @@
-from .barcode import Barcode
-from .image import Image
-from .qrcode import QrCode
-from .spacing import Spacing
-from .text import Text
+import importlib
+from typing import Dict, Type
+
+# Module of every printable type, they are only imported once a printable of the type is used
+PRINTABLE_MODULES: Dict[str, str] = {
+    'Barcode': 'printables.barcode',
+    'Image': 'printables.image',
+    'QrCode': 'printables.qrcode',
+    'Spacing': 'printables.spacing',
+    'Text': 'printables.text',
+}
+
+
+def _import_printable(name: str):
+    if name not in PRINTABLE_MODULES:
+        raise KeyError(f'Unknown printable type {name!r}')
+    return importlib.import_module(PRINTABLE_MODULES[name])
+
+
+def get_printable_class(name: str) -> Type:
+    """ The printable class with the given type name, importing its module """
+    return getattr(_import_printable(name), name)
+
+
+def get_printable_data_class(name: str) -> Type:
+    """ The data class of the printable type with the given name, e.g. TextData for Text """
+    return getattr(_import_printable(name), name + 'Data')
+
+
+def __getattr__(name: str):
+    if name in PRINTABLE_MODULES:
+        return get_printable_class(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,5 +1,9 @@
+import logging
+
 import barcode
 from typing import Optional
+
+import numpy as np
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QImage, QPainter, QColor, QStandardItemModel, QStandardItem
 from PyQt6.QtWidgets import QLineEdit, QLabel, QComboBox, QCheckBox
@@ -7,9 +11,12 @@ from barcode.writer import BaseWriter
 from barcode.errors import *
 
 from labelmaker import USABLE_HEIGHT
+from raster import packed_to_mono
 from printables.printable import Printable, PrintableData
 from printables.propsedit import PropsEdit
 
+log = logging.getLogger(__name__)
+
 
 class BarcodeData(PrintableData):
     def set_from(self, source):
@@ -80,6 +87,12 @@ class BarcodePropsEdit(PropsEdit):
 
 
 class BarcodeWriter(BaseWriter):
+    """ Rasterizes barcodes to label high Format_Mono images
+
+    BaseWriter.render hands over the modules packed into runs of bars and spaces. The bars are
+    filled into a single row, which is packed to 1bpp and copied to every row of the image, so
+    only the label is painted.
+    """
     dpi = 15
     text_size = 20
 
@@ -89,22 +102,23 @@ class BarcodeWriter(BaseWriter):
         self.draw_label = draw_label
 
     def _init(self, code):
-        print('init', code)
         width, height = self.calculate_size(len(code[0]), len(code), self.dpi * 25)
-        print(width, height)
-        image = QImage(width, USABLE_HEIGHT, QImage.Format.Format_ARGB32)
-        image.fill(0xffffffff)
-        self._painter = QPainter(image)
-        self._image = image
+        # True for the columns of bars
+        self._bars = np.zeros(width, dtype=bool)
+        self._image = None
 
     def _create_module(self, xpos, _ypos, width, color):
-        p = self._painter
-        p.setBrush(QColor(color))
-        x1 = int(xpos * self.dpi)
-        y1 = 0
-        x2 = int(width * self.dpi)
-        y2 = int(USABLE_HEIGHT)
-        p.drawRect(x1, y1, x2, y2)
+        # The row starts out as spaces
+        if color == self.background:
+            return
+        # Both edges are rounded the same way, so adjacent runs neither overlap nor leave gaps
+        self._bars[int(xpos * self.dpi):int((xpos + width) * self.dpi)] = True
+
+    def _create_image(self) -> QImage:
+        if self._image is None:
+            row = np.packbits(~self._bars)
+            self._image = packed_to_mono(np.broadcast_to(row, (USABLE_HEIGHT, row.size)), self._bars.size)
+        return self._image
 
     def _create_text(self, _xpos, _ypos):
         if not self.draw_label:
@@ -114,23 +128,24 @@ class BarcodeWriter(BaseWriter):
             barcode_text = self.human
         else:
             barcode_text = self.text
-        p = self._painter
+        image = self._create_image()
+        p = QPainter(image)
 
         font = p.font()
         font.setPixelSize(self.text_size)
         p.setFont(font)
-        bounds = p.drawText(self._image.rect(), Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignCenter, barcode_text)
+        bounds = p.drawText(image.rect(), Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignCenter, barcode_text)
         p.setBrush(QColor(0xffffffff))
         pen = p.pen()
         p.setPen(Qt.PenStyle.NoPen)
         p.drawRect(bounds)
         p.setPen(pen)
 
-        p.drawText(self._image.rect(), Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignCenter, barcode_text)
+        p.drawText(image.rect(), Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignCenter, barcode_text)
+        p.end()
 
     def _finish(self):
-        self._painter.end()
-        return self._image
+        return self._create_image()
 
     def save(self, filename, output):
         pass
@@ -158,7 +173,7 @@ class Barcode(Printable):
         writer = BarcodeWriter(self.data.draw_label)
         self.render_error = None
         try:
-            print(d.code_type, d.text)
+            log.debug(f'Barcode: {d.code_type}, Text: {d.text}')
             img = barcode.generate(d.code_type, d.text, writer)
         except BarcodeError as x:
             self.render_error = x
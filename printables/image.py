@@ -1,34 +1,115 @@
 import os
-from typing import Optional
+from typing import Optional, Tuple
 
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QImage, QPainter, QPixmap, QIcon
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QLabel, QSlider, QHBoxLayout, QPushButton, QFileDialog
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QLabel, QSlider, QHBoxLayout, QPushButton, QFileDialog, \
+    QComboBox
 
 from labelmaker import USABLE_HEIGHT
 from margins import Margins
 from printables.printable import Printable, PrintableData
 from printables.propsedit import PropsEdit
+import dither
+from image_cache import FileKey, ImageCache, file_key
+from raster import array_to_mono, color_value, image_to_array
+
+# Decoded source images, scaled to the label height, and their icons. Shared by all Image printables.
+source_cache = ImageCache(64 << 20)
+thumbnail_cache = ImageCache(1 << 20)
+
+THUMBNAIL_SIZE = 32
+
+
+def make_thumbnail(img_source: QImage) -> QImage:
+    img = QImage(THUMBNAIL_SIZE, THUMBNAIL_SIZE, QImage.Format.Format_ARGB32)
+    img.fill(0xffffffff)
+
+    p = QPainter(img)
+    p.drawRect(0, 0, 30, 30)
+    if img_source.width() > img_source.height():
+        scaled = img_source.scaledToWidth(32)
+        p.drawImage(0, 16 - (scaled.height() // 2), scaled)
+    else:
+        scaled = img_source.scaledToHeight(32)
+        p.drawImage(16 - (scaled.width() // 2), 0, scaled)
+    p.end()
+
+    return img.convertToFormat(QImage.Format.Format_Mono)
+
+
+def make_source(img_src: QImage) -> QImage:
+    """ Flatten any transparency onto white and scale to the label height """
+    if img_src.hasAlphaChannel():
+        img = QImage(img_src.size(), QImage.Format.Format_ARGB32)
+        img.fill(0xffffffff)
+        p = QPainter(img)
+
+        p.drawImage(0, 0, img_src)
+        p.end()
+    else:
+        img = img_src
+    return img.scaledToHeight(USABLE_HEIGHT, Qt.TransformationMode.FastTransformation)
+
+
+def decode(file_name: str, key: FileKey) -> Tuple[QImage, QImage]:
+    """ Decode the file once and fill both caches from it, returning the source and the thumbnail
+
+    The images are returned directly, they may not fit the caches or be evicted by another thread right away.
+    """
+    img_src = QImage(file_name)
+    source = make_source(img_src)
+    thumbnail = make_thumbnail(img_src)
+    source_cache.put(key, source)
+    thumbnail_cache.put(key, thumbnail)
+    return source, thumbnail
+
+
+def load_source(file_name: str) -> QImage:
+    key = file_key(file_name)
+    img = source_cache.get(key)
+    if img is None:
+        img, _ = decode(file_name, key)
+    return img
+
+
+def load_thumbnail(file_name: str) -> QImage:
+    key = file_key(file_name)
+    img = thumbnail_cache.get(key)
+    if img is None:
+        _, img = decode(file_name, key)
+    return img
 
 
 class ImageData(PrintableData):
     source = ''
     threshold = 127
+    dither = 'threshold'
 
     def __init__(
             self, image_source: Optional[str] = None, 
-            threshold: int = 127, margins: Optional[Margins] = None
+            threshold: int = 127, margins: Optional[Margins] = None,
+            dither: str = 'threshold'
     ):
         super().__init__(margins)
         self.source = image_source
         self.threshold = threshold
+        self.dither = dither
 
     def clone(self):
-        return ImageData(self.source, self.threshold, self.margins)
+        return ImageData(self.source, self.threshold, self.margins, self.dither)
 
     def set_from(self, source):
         self.source = source.source
         self.threshold = source.threshold
+        self.dither = source.dither
+
+    def content_key(self):
+        # Also changes when the file is replaced or edited
+        version = None
+        if self.source is not None and os.path.isfile(self.source):
+            version = file_key(self.source)
+        return super().content_key(), version
 
 
 class ImagePropsEdit(PropsEdit):
@@ -47,7 +128,8 @@ class ImagePropsEdit(PropsEdit):
         self.preview_image = QLabel()
         self.preview_image.setFixedHeight(USABLE_HEIGHT)
         self.preview_image.setMaximumWidth(USABLE_HEIGHT * 2)
-        self.preview_image.setPixmap(QPixmap(data.source).scaledToHeight(USABLE_HEIGHT))
+        if data.source is not None and os.path.isfile(data.source):
+            self.preview_image.setPixmap(QPixmap.fromImage(load_source(data.source)))
 
         layout.addWidget(self.preview_image)
         layout.addWidget(QLabel('Source:'))
@@ -73,6 +155,15 @@ class ImagePropsEdit(PropsEdit):
         # slider.setMinimumWidth(128)
         layout.addWidget(slider)
         slider.update()
+
+        self.combo_dither = QComboBox(self)
+        for key, (name, _) in dither.METHODS.items():
+            self.combo_dither.addItem(name, key)
+        self.combo_dither.setCurrentIndex(max(0, self.combo_dither.findData(data.dither)))
+        self.combo_dither.currentIndexChanged.connect(self.save)
+        layout.addWidget(QLabel('Dithering:'))
+        layout.addWidget(self.combo_dither)
+
         layout.addStretch()
 
     def on_open_image(self):
@@ -101,6 +192,7 @@ class ImagePropsEdit(PropsEdit):
             return
         self.data.source = self.edit_text.text()
         self.data.threshold = self.thresh_slider.value()
+        self.data.dither = self.combo_dither.currentData()
 
 
 class Image(Printable):
@@ -126,21 +218,7 @@ class Image(Printable):
             return Image.get_generic_icon()
         elif not os.path.isfile(self.data.source):
             return Image.get_generic_icon(False)
-        img_source = QImage(self.data.source)
-        img = QImage(32, 32, QImage.Format.Format_ARGB32)
-        img.fill(0xffffffff)
-
-        p = QPainter(img)
-        p.drawRect(0, 0, 30, 30)
-        if img_source.width() > img_source.height():
-            scaled = img_source.scaledToWidth(32)
-            p.drawImage(0, 16 - (scaled.height() // 2), scaled)
-        else:
-            scaled = img_source.scaledToHeight(32)
-            p.drawImage(16 - (scaled.width() // 2), 0, scaled)
-        p.end()
-
-        img = img.convertToFormat(QImage.Format.Format_Mono)
+        img = load_thumbnail(self.data.source)
 
         return QIcon(QPixmap.fromImage(img))
 
@@ -153,33 +231,13 @@ class Image(Printable):
         if not os.path.isfile(d.source):
             self.render_error = FileNotFoundError(f'Source file not found: {d.source}')
             return QImage(0, USABLE_HEIGHT, QImage.Format.Format_Mono)
-        img_src = QImage(d.source)
-        if img_src.hasAlphaChannel():
-            img = QImage(img_src.size(), QImage.Format.Format_ARGB32)
-            img.fill(0xffffffff)
-            p = QPainter(img)
-
-            p.drawImage(0, 0, img_src)
-            p.end()
-        else:
-            img = img_src
-        # img.convertToFormat(QImage.Format_Mono)
-        img = img.scaledToHeight(USABLE_HEIGHT, Qt.TransformationMode.FastTransformation)
-        rect = img.rect() # .marginsAdded(d.margins.getQMargins())
-
-        max_x = img.width()
-        max_y = USABLE_HEIGHT
-
-        bitmap = QImage(rect.width(), USABLE_HEIGHT, QImage.Format.Format_Mono)
-        for x in range(0, rect.width()):
-            for y in range(0, USABLE_HEIGHT):
-                if x >= max_x or x <= 0 or y > max_y or y < 0:
-                    bitmap.setPixel(x, y, 1)
-                    continue
-
-                oc = img.pixelColor(x, y)
-                if oc.value() > d.threshold:
-                    bitmap.setPixel(x, y, 1)
-                else:
-                    bitmap.setPixel(x, y, 0)
-        return bitmap
+        img = load_source(d.source)
+        if img.isNull():
+            self.render_error = OSError(f'Could not read image: {d.source}')
+            return QImage(0, USABLE_HEIGHT, QImage.Format.Format_Mono)
+
+        # White where the pixel value is above the threshold (or dithered around it), the first column is always white
+        _, method = dither.METHODS.get(d.dither, dither.METHODS['threshold'])
+        white = method(color_value(image_to_array(img)), d.threshold)
+        white[:, :1] = True
+        return array_to_mono(white)
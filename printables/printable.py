@@ -1,5 +1,5 @@
 import abc
-from typing import Optional
+from typing import Hashable, Optional, Tuple
 import logging
 from PyQt6.QtCore import Qt, QLineF, QPointF
 from PyQt6.QtGui import QImage, QPainter, QColor, QIcon, QPixmap, QStandardItem, QPainterPath, QAction
@@ -23,10 +23,18 @@ class PrintableData:
     def set_from(self, source):
         self.margins = source.margins.clone()
 
+    def content_key(self) -> Hashable:
+        """ Key that changes whenever the rendered image would, margins are applied afterwards and not included """
+        return (type(self).__name__,) + tuple(
+            (name, value) for name, value in sorted(vars(self).items()) if name != 'margins')
+
 
 class Printable(abc.ABC):
     render_error: Optional[Exception] = None
 
+    # Content key, image and error of the last render_cached call
+    _render_cache: Optional[Tuple[Hashable, QImage, Optional[Exception]]] = None
+
     @classmethod
     def get_add_add_action(cls, parent):
         action = QAction('Add ' + cls.__name__, parent)
@@ -55,6 +63,34 @@ class Printable(abc.ABC):
     def render(self) -> QImage:
         raise NotImplementedError
 
+    def get_content_key(self) -> Hashable:
+        return self.data.content_key()
+
+    def is_render_cached(self) -> bool:
+        cached = self._render_cache
+        return cached is not None and cached[0] == self.get_content_key()
+
+    def set_render_cache(self, key: Hashable, image: QImage, render_error: Optional[Exception] = None):
+        """ Store an image rendered elsewhere (e.g. from a copy of the data on another thread) for content `key` """
+        self._render_cache = (key, image, render_error)
+
+    def render_cached(self) -> QImage:
+        """ Render, unless the content has not changed since the last call """
+        key = self.get_content_key()
+        cached = self._render_cache
+        if cached is not None and cached[0] == key:
+            self.render_error = cached[2]
+            return cached[1]
+        image = self.render()
+        self._render_cache = (key, image, self.render_error)
+        return image
+
+    def __getstate__(self):
+        # The render cache is not saved to label files, QImage cannot be pickled
+        state = self.__dict__.copy()
+        state.pop('_render_cache', None)
+        return state
+
     def get_margins(self):
         return Margins(0, 0, 0, 1)
 
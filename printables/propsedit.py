@@ -42,4 +42,4 @@ class PropsEdit(QWidget):
         self.data_original.set_from(self.data)
         self.printable.data = self.data
         self.parent.update_current_item()
-        self.parent.update_preview()
+        self.parent.schedule_preview()
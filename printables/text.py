@@ -1,14 +1,15 @@
 import logging
 from copy import copy
 from string import ascii_letters
-from typing import Tuple
+from typing import Sequence, Tuple
 
-from PyQt6.QtCore import Qt, QMargins
-from PyQt6.QtGui import QFont, QImage, QPainter, QFontMetrics
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QLabel, QPushButton, QFontDialog, QHBoxLayout, QSizePolicy, \
-    QFontComboBox, QGroupBox, QSpinBox, QCheckBox
+from PyQt6.QtCore import QMargins
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFontDialog, QHBoxLayout, QSizePolicy, \
+    QFontComboBox, QGroupBox, QSpinBox, QCheckBox, QPlainTextEdit, QComboBox, QLineEdit
 
 from typing import Optional
+import text_layout
 from labelmaker import USABLE_HEIGHT
 from margins import Margins
 from printables.printable import Printable, PrintableData
@@ -19,10 +20,22 @@ log = logging.getLogger(__name__)
 
 
 class TextData(PrintableData):
-
-    def __init__(self, text='', font_string=None, margins: Optional[Margins] = None):
+    # Scale the text to the label height (and max_width, if set) when rendering, instead of using the font size
+    fit = False
+    max_width = 0
+    # Alignment and relative size of the lines of text with line breaks, the last alignment holds for the lines
+    # after it, see text_layout.split_lines
+    line_aligns: Tuple[str, ...] = ()
+    line_sizes: Tuple[float, ...] = ()
+
+    def __init__(self, text='', font_string=None, margins: Optional[Margins] = None, fit=False, max_width=0,
+                 line_aligns: Tuple[str, ...] = (), line_sizes: Tuple[float, ...] = ()):
         super().__init__(margins)
         self.text = text
+        self.fit = fit
+        self.max_width = max_width
+        self.line_aligns = tuple(line_aligns)
+        self.line_sizes = tuple(line_sizes)
 
         if font_string is None:
             font = QFont()
@@ -42,12 +55,17 @@ class TextData(PrintableData):
         return font
 
     def clone(self):
-        return TextData(self.text, self.font_string, self.margins.clone())
+        return TextData(self.text, self.font_string, self.margins.clone(), self.fit, self.max_width,
+                        self.line_aligns, self.line_sizes)
 
     def set_from(self, source):
         super().set_from(source)
         self.text = source.text
         self.font_string = source.font_string
+        self.fit = source.fit
+        self.max_width = source.max_width
+        self.line_aligns = source.line_aligns
+        self.line_sizes = source.line_sizes
 
     def __str__(self):
         m = self.margins
@@ -65,11 +83,45 @@ class TextPropsEdit(PropsEdit):
 
         self.setMinimumWidth(256)
 
-        self.edit_text = QLineEdit(self.data.text, self)
+        # Every line of the text is a line on the label
+        self.edit_text = QPlainTextEdit(self.data.text, self)
+        self.edit_text.setFixedHeight(self.edit_text.fontMetrics().lineSpacing() * 4)
         self.edit_text.textChanged.connect(self.text_changed)
         self.layout.addWidget(QLabel('Text:'))
         self.layout.addWidget(self.edit_text)
 
+        self.combo_align = QComboBox(self)
+        for align in text_layout.ALIGNMENTS:
+            self.combo_align.addItem(align.capitalize(), align)
+        if len(data.line_aligns) > 0:
+            self.combo_align.setCurrentIndex(max(0, self.combo_align.findData(data.line_aligns[0])))
+        self.combo_align.currentIndexChanged.connect(self.align_changed)
+        self.layout.addWidget(QLabel('Line alignment:'))
+        self.layout.addWidget(self.combo_align)
+
+        # Relative sizes of the lines, lines without one get size 1
+        self.edit_line_sizes = QLineEdit(', '.join(f'{size:g}' for size in data.line_sizes), self)
+        self.edit_line_sizes.setPlaceholderText('1, 0.5, ...')
+        self.edit_line_sizes.editingFinished.connect(self.line_sizes_changed)
+        self.layout.addWidget(QLabel('Line sizes:'))
+        self.layout.addWidget(self.edit_line_sizes)
+
+        fit_layout = QHBoxLayout()
+        self.check_fit = QCheckBox('Fit to label', self)
+        self.check_fit.setChecked(data.fit)
+        self.check_fit.stateChanged.connect(self.fit_changed)
+        fit_layout.addWidget(self.check_fit)
+        fit_layout.addStretch()
+        self.max_width = QSpinBox(self)
+        self.max_width.setMaximum(9999)
+        self.max_width.setSpecialValueText('None')
+        self.max_width.setValue(data.max_width)
+        self.max_width.valueChanged.connect(self.fit_changed)
+        fit_layout.addWidget(QLabel('Max width:'))
+        fit_layout.addWidget(self.max_width)
+        fit_layout.addWidget(QLabel('px'))
+        self.layout.addLayout(fit_layout)
+
         self.button_font = QPushButton(self.get_font_name())
         self.button_font.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         self.button_font.clicked.connect(self.button_font_clicked)
@@ -129,7 +181,11 @@ class TextPropsEdit(PropsEdit):
     def serialize(self, clone=False) -> TextData:
         data = super().serialize(clone)
 
-        data.text = self.edit_text.text()
+        data.text = self.edit_text.toPlainText()
+        data.line_aligns = self.data.line_aligns
+        data.line_sizes = self.data.line_sizes
+        data.fit = self.check_fit.isChecked()
+        data.max_width = self.max_width.value()
         font = self.font_family.currentFont()
         target_font_size = self.font_size.value()
         data.auto_size = self.auto_size.isChecked()
@@ -157,6 +213,25 @@ class TextPropsEdit(PropsEdit):
         self.save()
 
     def text_changed(self):
+        self.update_adjusted()
+        self.save()
+
+    def fit_changed(self):
+        self.save()
+
+    def line_sizes_changed(self):
+        try:
+            sizes = tuple(float(size) for size in self.edit_line_sizes.text().replace(',', ' ').split())
+        except ValueError:
+            log.warning(f'Invalid line sizes: {self.edit_line_sizes.text()}')
+            return
+        self.data.line_sizes = sizes
+        self.update_adjusted()
+        self.save()
+
+    def align_changed(self):
+        # Aligns all lines the same, alignments per line are kept until this is changed
+        self.data.line_aligns = (self.combo_align.currentData(),)
         self.save()
 
     def default_clicked(self):
@@ -170,7 +245,7 @@ class TextPropsEdit(PropsEdit):
 
         if self.auto_size.isChecked():
             self.adjusted_size = self.calc_adjusted_size_for_font(
-                font, self.font_size.value(), self.edit_text.text())
+                font, self.font_size.value(), self.edit_text.toPlainText(), self.data.line_sizes)
             self.adjusted_size_label.setText(
                 f'Adjusted size: {self.adjusted_size}px')
         else:
@@ -178,17 +253,19 @@ class TextPropsEdit(PropsEdit):
 
     @staticmethod
     def calc_adjusted_size_for_font(
-        font: QFont, font_size: int, text: str = ascii_letters
+        font: QFont, font_size: int, text: str = ascii_letters, line_sizes: Sequence[float] = ()
     ) -> int:
-        font.setPixelSize(68)
-        metrics = QFontMetrics(font)
-        rect = metrics.boundingRect(text)
-        log.debug(f'Font: {font.family()}')
-        log.debug(f'Height: {rect.height()}, {rect.top()} <-> {rect.bottom()}, CapHeight: {metrics.capHeight()}')
-        log.debug(f'Ascent: {metrics.ascent()}, FontSize: {font_size}')
-        over_ascent = rect.height() - font_size
-        log.debug(f'OverAscent: {over_ascent}')
-        adjusted_size = font_size - over_ascent
+        """ The largest pixel size at which the ink of every line of `text` is at most `font_size` high, lines with
+        a relative size other than 1 are measured against `font_size` scaled the same way as they are rendered """
+        # Fonts that only differ in size share the memoized metrics
+        font = QFont(font)
+        font.setPixelSize(USABLE_HEIGHT)
+        font_string = font.toString()
+        lines, _, sizes = text_layout.split_lines(text, sizes=line_sizes)
+        adjusted_size = max(1, min(
+            int(text_layout.fit_pixel_size(font_string, line, max(1, round(font_size * size))) / size)
+            for line, size in zip(lines, sizes)))
+        log.debug(f'Font: {font.family()}, FontSize: {font_size}, Adjusted: {adjusted_size}')
         return adjusted_size
 
     def button_font_clicked(self):
@@ -214,23 +291,13 @@ class Text(Printable):
         return self.data.margins
 
     def get_name(self):
-        return self.data.text
+        return self.data.text.replace('\n', ' ')
 
     def get_props_editor(self, parent):
         return TextPropsEdit(self.data, parent, self)
 
     def render(self):
         d = self.data
-        font = QFont()
-        font.fromString(d.font_string)
-        width = QFontMetrics(font).horizontalAdvance(d.text)
-        log.debug(f'Width: {width}, Font: {font}, Text: {d.text}')
-        img = QImage(width, USABLE_HEIGHT, QImage.Format.Format_Mono)
-        img.fill(0xffffffff)
-        p = QPainter(img)
-        p.setFont(font)
-        rect = img.rect() # .marginsRemoved(d.margins.getQMargins())
-        p.drawText(rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignHCenter, d.text)
-        p.end()
-        del p
-        return img
+        log.debug(f'Font: {d.font_string}, Text: {d.text}')
+        # Shaped and rendered lines are cached by font and text, shared between all Text printables
+        return text_layout.render_text(d.font_string, d.text, d.line_aligns, d.line_sizes, d.fit, d.max_width)
@@ -1,18 +1,8 @@
-import asyncio
 import logging
 import sys
 import os.path as path
 
-from PyQt6.QtWidgets import QApplication
-from qasync import QEventLoop
-
-from gui import EditorWindow
-from margins import Margins
-from printables.barcode import BarcodeData, Barcode
-from printables.spacing import Spacing, SpacingData
-from printables.text import TextData, Text as TextItem
-from printables.image import ImageData, Image as ImageItem
-from cli import get_parser, CliPrint
+from cli import get_parser
 
 testdata = path.join(path.dirname(__file__) + '/testdata/')
 
@@ -21,6 +11,19 @@ if not sys.gettrace() is None:
 
 
 def run(seed=False):
+    # The GUI is imported here, so the print command does not load the widgets, qasync and asyncio
+    import asyncio
+
+    from PyQt6.QtWidgets import QApplication
+    from qasync import QEventLoop
+
+    from gui import EditorWindow
+    from margins import Margins
+    from printables.barcode import BarcodeData, Barcode
+    from printables.spacing import Spacing, SpacingData
+    from printables.text import TextData, Text as TextItem
+    from printables.image import ImageData, Image as ImageItem
+
     app = QApplication(sys.argv)
     editor = EditorWindow(app)
     editor.show()
@@ -54,6 +57,7 @@ def main():
     if args.runtime == "gui":
         run("seed" in args and args.seed)
     else:
+        from cli.cli_print import CliPrint
         CliPrint.run(args)
 
 
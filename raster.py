@@ -0,0 +1,76 @@
+import sys
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+from labelmaker import BUFFER_HEIGHT, PRINT_MARGIN
+
+# Any pixel at or below opaque black is printed (this also catches transparent pixels)
+BLACK_THRESHOLD = 0xff000000
+
+
+def image_to_array(image: QImage) -> np.ndarray:
+    """ Get a (height, width) uint32 ARGB view of `image`
+
+    The image is converted to ARGB32 first, so the values match what `QImage.pixel` returns.
+    """
+    argb = image.convertToFormat(QImage.Format.Format_ARGB32)
+    ptr = argb.constBits()
+    ptr.setsize(argb.sizeInBytes())
+    words_per_line = argb.bytesPerLine() // 4
+    data = np.frombuffer(ptr, dtype=np.uint32).reshape(argb.height(), words_per_line)
+    # Copy, so the result does not outlive the converted image buffer
+    return data[:, :argb.width()].copy()
+
+
+def array_to_mono(white: np.ndarray) -> QImage:
+    """ Create a Format_Mono image from a (height, width) bool array, True for white pixels """
+    return packed_to_mono(np.packbits(white, axis=1), white.shape[1])
+
+
+def image_to_packed(image: QImage) -> np.ndarray:
+    """ Pack the rows of `image` into a (height, (width + 7) // 8) uint8 array, MSB first and 1 for white pixels """
+    if image.width() == 0 or image.height() == 0:
+        return np.zeros((image.height(), 0), dtype=np.uint8)
+    return np.packbits(image_to_array(image) > BLACK_THRESHOLD, axis=1)
+
+
+def packed_to_mono(packed: np.ndarray, width: int) -> QImage:
+    """ Create a Format_Mono image of `width` columns from rows packed by `image_to_packed` """
+    height = packed.shape[0]
+    image = QImage(width, height, QImage.Format.Format_Mono)
+    if width > 0 and height > 0:
+        # Format_Mono is MSB first, with color index 0 black and 1 white
+        ptr = image.bits()
+        ptr.setsize(image.sizeInBytes())
+        lines = np.frombuffer(ptr, dtype=np.uint8).reshape(height, image.bytesPerLine())
+        lines[:, :packed.shape[1]] = packed
+    return image
+
+
+def color_value(pixels: np.ndarray) -> np.ndarray:
+    """ The HSV value (largest of the red, green and blue components) of ARGB pixels, as `QColor.value` returns """
+    rgb = pixels.view(np.uint8).reshape(pixels.shape + (4,))
+    # ARGB32 is stored as BGRA on little endian machines
+    if sys.byteorder == 'little':
+        rgb = rgb[..., :3]
+    else:
+        rgb = rgb[..., 1:]
+    return rgb.max(axis=-1)
+
+
+def pack_print_image(image: QImage) -> bytearray:
+    """ Pack a composed label image into the 1bpp column raster the printer expects
+
+    Every column of the image becomes one raster line of BUFFER_HEIGHT bits (MSB first), with the image placed
+    between the top and bottom PRINT_MARGIN.
+    """
+    width = image.width()
+    height = min(image.height(), BUFFER_HEIGHT - (PRINT_MARGIN * 2))
+
+    columns = np.zeros((width, BUFFER_HEIGHT), dtype=bool)
+    if width > 0 and height > 0:
+        pixels = image_to_array(image)[:height]
+        columns[:, PRINT_MARGIN:PRINT_MARGIN + height] = (pixels <= BLACK_THRESHOLD).T
+
+    return bytearray(np.packbits(columns, axis=1).tobytes())
@@ -3,7 +3,6 @@ import os
 from pickle import Pickler, Unpickler
 
 import appdirs
-import yaml
 
 from app import APP_NAME, APP_AUTHOR
 from printables.printable import PrintableData
@@ -46,6 +45,8 @@ class Settings:
         file_path = os.path.join(config_dir, 'settings.yml')
 
         if os.path.isfile(file_path):
+            # Only the GUI loads the settings, the CLI does not need yaml
+            import yaml
             try:
                 with open(file_path, 'r') as file:
                     settings = yaml.load(file)
@@ -18,7 +18,7 @@ data_files = [
 ]
 
 setup_requires = []
-requires = ['PyQt6', 'django-qrcode', 'pyserial', 'packbits', 'pypng', 'appdirs']
+requires = ['PyQt6', 'django-qrcode', 'pyserial', 'packbits', 'pypng', 'numpy', 'appdirs']
 kwargs = {}
 
 if is_mac:
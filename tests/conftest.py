@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+# Rendering needs fonts and painting, not a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from PyQt6.QtGui import QGuiApplication
+    return QGuiApplication.instance() or QGuiApplication([])
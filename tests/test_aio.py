@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from labelmaker.aio import AsyncLabelMaker, ExecutorConnection, STATUS_SIZE
+from labelmaker.config import LabelMakerConfig
+from labelmaker.emulator import EmulatedPrinterDevice
+from labelmaker.encode import RASTER_LINE_SIZE
+from labelmaker.status import STATUS_PRINT_DONE, STATUS_REPLY
+
+
+def label_raster(line_count: int) -> bytearray:
+    return bytearray(bytes([0xf0, 0x0f]) * (line_count * RASTER_LINE_SIZE // 2))
+
+
+def test_print_job_alongside_query_status():
+    device = EmulatedPrinterDevice()
+    pages = [label_raster(100), label_raster(30)]
+
+    async def run():
+        async with await AsyncLabelMaker.open(device, LabelMakerConfig()) as label_maker:
+            return await asyncio.gather(label_maker.print_job(pages), label_maker.query_status(),
+                                        label_maker.query_status())
+
+    printed, status1, status2 = asyncio.run(run())
+
+    # Every reply reaches the command that asked for it
+    assert [s.status_type for s in printed] == [STATUS_PRINT_DONE, STATUS_PRINT_DONE]
+    assert status1.status_type == STATUS_REPLY
+    assert status2.status_type == STATUS_REPLY
+    assert [bytes(page.data) for page in device.emulator.pages] == [bytes(page) for page in pages]
+    assert len(device.emulator.replies) == 0
+
+
+def test_read_timeout():
+    device = EmulatedPrinterDevice()
+
+    async def run():
+        connection = await device.open_async()
+        start = time.perf_counter()
+        # Nothing was asked, so the emulator never answers
+        data = await connection.read(STATUS_SIZE, timeout=0.1)
+        elapsed = time.perf_counter() - start
+        connection.close()
+        return data, elapsed
+
+    data, elapsed = asyncio.run(run())
+    assert data == b''
+    assert 0.1 <= elapsed < 1
+
+
+def test_status_without_reply():
+    device = EmulatedPrinterDevice()
+
+    async def run():
+        label_maker = await AsyncLabelMaker.open(device)
+        # A partial reply, the rest never arrives
+        device.emulator.replies.extend(b'\x80\x20')
+        data = await label_maker.connection.read(STATUS_SIZE, timeout=0.05)
+        await label_maker.close()
+        return data
+
+    assert asyncio.run(run()) == b'\x80\x20'
+
+
+class SlowStream:
+    """ A blocking stream whose reads take `delay` seconds """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.reads = 0
+
+    def read(self, size: int) -> bytes:
+        self.reads += 1
+        time.sleep(self.delay)
+        return b'\x01' * size
+
+    def write(self, data) -> int:
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def test_executor_read_timeout():
+    stream = SlowStream(0.3)
+
+    async def run():
+        connection = ExecutorConnection(stream)
+        start = time.perf_counter()
+        first = await connection.read(4, timeout=0.05)
+        elapsed = time.perf_counter() - start
+        # The read that timed out is picked up again instead of starting another one
+        second = await connection.read(4, timeout=1)
+        return first, elapsed, second
+
+    first, elapsed, second = asyncio.run(run())
+    assert first == b''
+    assert elapsed < 0.25
+    assert second == b'\x01' * 4
+    assert stream.reads == 1
@@ -0,0 +1,54 @@
+from itertools import groupby
+
+import pytest
+from PyQt6.QtGui import QColor
+
+import barcode
+from labelmaker import USABLE_HEIGHT
+from printables.barcode import Barcode, BarcodeData, BarcodeWriter
+
+CODES = [('ean13', '590123412345'), ('code128', 'PyTouch-42')]
+
+
+def expected_row(code, writer):
+    """ The bar columns of `code`, filled run by run like BaseWriter.render hands them over """
+    width, _ = writer.calculate_size(len(code), 1, writer.dpi * 25)
+    row = [False] * width
+    xpos = writer.quiet_zone
+    for module, run in groupby(code):
+        run_width = writer.module_width * len(list(run))
+        if module == '1':
+            for x in range(int(xpos * writer.dpi), int((xpos + run_width) * writer.dpi)):
+                row[x] = True
+        xpos += run_width
+    return row
+
+
+def bar_row(image, y):
+    black = QColor(0, 0, 0)
+    return [image.pixelColor(x, y) == black for x in range(image.width())]
+
+
+@pytest.mark.parametrize('code_type, text', CODES)
+def test_render_matches_modules(app, code_type, text):
+    writer = BarcodeWriter()
+    image = barcode.generate(code_type, text, writer)
+    code = barcode.get(code_type, text).build()
+    row = expected_row(code[0], writer)
+
+    assert (image.width(), image.height()) == (len(row), USABLE_HEIGHT)
+    assert any(row)
+    for y in (0, USABLE_HEIGHT // 2, USABLE_HEIGHT - 1):
+        assert bar_row(image, y) == row
+
+
+@pytest.mark.parametrize('code_type, text', CODES)
+def test_render_label(app, code_type, text):
+    plain = Barcode(BarcodeData(text=text, code_type=code_type)).render()
+    labeled = Barcode(BarcodeData(text=text, code_type=code_type, draw_label=True)).render()
+
+    assert labeled.size() == plain.size()
+    # The label is painted over the bottom of the bars only
+    assert bar_row(labeled, 0) == bar_row(plain, 0)
+    bottom = USABLE_HEIGHT - 1 - BarcodeWriter.text_size // 2
+    assert bar_row(labeled, bottom) != bar_row(plain, bottom)
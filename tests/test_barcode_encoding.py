@@ -0,0 +1,55 @@
+import pytest
+
+import barcode
+from barcode.errors import BarcodeError
+
+# A valid code for every barcode type
+CODES = {
+    'code128': 'PyTouch-42',
+    'code39': 'PYTOUCH 42',
+    'ean': '590123412345',
+    'ean13': '590123412345',
+    'ean8': '1234567',
+    'gs1': '978316148410',
+    'gtin': '590123412345',
+    'isbn': '978316148410',
+    'isbn10': '316148410',
+    'isbn13': '978316148410',
+    'issn': '0317847',
+    'itf': '12345678',
+    'jan': '490123456789',
+    'pzn': '123456',
+    'upc': '01234567890',
+    'upca': '01234567890',
+}
+
+
+def test_every_type_has_a_code():
+    assert sorted(CODES) == barcode.PROVIDED_BARCODES
+
+
+@pytest.mark.parametrize('name', barcode.PROVIDED_BARCODES)
+def test_encoded_matches_build(name):
+    code = CODES[name]
+    assert barcode.get_encoded(name, code).modules() == barcode.get(name, code).build()
+    # Again from the cache
+    assert barcode.get_encoded(name, code).modules() == barcode.get(name, code).build()
+
+
+def test_invalid_code_is_not_cached():
+    size = barcode._get_built.cache_info().currsize
+    for _ in range(3):
+        with pytest.raises(BarcodeError):
+            barcode.get_encoded('ean13', 'not a number')
+    assert barcode._get_built.cache_info().currsize == size
+
+
+def test_copies_do_not_share_writers():
+    first = barcode.get_encoded('ean13', CODES['ean13'])
+    second = barcode.get_encoded('ean13', CODES['ean13'])
+    assert first.writer is not second.writer
+
+    writer = barcode.get('ean13').default_writer()
+    third = barcode.get_encoded('ean13', CODES['ean13'], writer)
+    assert third.writer is writer
+    assert first.writer is not writer and second.writer is not writer
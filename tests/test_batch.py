@@ -0,0 +1,39 @@
+import pytest
+
+from cli.batch import fill_item, output_name
+from printables.barcode import Barcode, BarcodeData
+from printables.text import Text, TextData
+
+
+def test_fill_content_fields(app):
+    item = Text(TextData('{name} ({index})'))
+    filled = fill_item(item, {'name': 'Jane'}, 3)
+    assert filled.data.text == 'Jane (3)'
+    # The template is left alone
+    assert item.data.text == '{name} ({index})'
+
+    barcode = fill_item(Barcode(BarcodeData(None, '{code}', 'code128')), {'code': 'A-12'}, 1)
+    assert barcode.data.text == 'A-12'
+
+
+def test_fill_leaves_other_fields(app):
+    item = Text(TextData('{name}'))
+    item.data.font_string = 'Family {x},68,-1'
+    filled = fill_item(item, {'name': 'Jane'}, 1)
+    assert filled.data.font_string == 'Family {x},68,-1'
+
+
+def test_item_without_placeholders_is_reused(app):
+    item = Text(TextData('Fixed'))
+    item.data.font_string = '{not a field}'
+    assert fill_item(item, {}, 1) is item
+
+
+def test_missing_field(app):
+    with pytest.raises(ValueError):
+        fill_item(Text(TextData('{missing}')), {'name': 'Jane'}, 1)
+
+
+def test_output_name():
+    assert output_name('out/{name}.png', {'name': 'a'}, 1) == 'out/a.png'
+    assert output_name('out/label.png', {}, 12) == 'out/label-0012.png'
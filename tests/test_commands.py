@@ -0,0 +1,44 @@
+import random
+
+from labelmaker import LabelMaker
+from labelmaker.commands import CommandBuilder, DEFAULT_CHUNK_SIZE
+from labelmaker.config import LabelMakerConfig
+from labelmaker.emulator import EmulatedPrinterDevice
+from labelmaker.encode import RASTER_LINE_SIZE, encode_raster_transfer
+
+
+def label_raster(line_count: int) -> bytearray:
+    rng = random.Random(line_count)
+    return bytearray(rng.choice([0x00, 0xff, rng.randrange(256)]) for _ in range(line_count * RASTER_LINE_SIZE))
+
+
+def test_chunks_can_be_consumed_twice():
+    data = label_raster(300)
+    builder = CommandBuilder().set_compression().raster(data).print_and_feed()
+    first = builder.build()
+    assert builder.build() == first
+    assert first == b'\x4D\x02' + encode_raster_transfer(data) + b'\x1A'
+
+
+def test_chunks_are_full_size():
+    builder = CommandBuilder().initialize().raster(label_raster(1000)).print_and_feed()
+    chunks = list(builder.chunks(256))
+    assert all(len(chunk) == 256 for chunk in chunks[:-1])
+    assert 0 < len(chunks[-1]) <= 256
+
+
+def test_print_job_write_count():
+    device = EmulatedPrinterDevice()
+    pages = [label_raster(200), label_raster(50), label_raster(400)]
+    with LabelMaker(device, LabelMakerConfig()) as label_maker:
+        label_maker.print_job(pages)
+    connection = device.connections[0]
+
+    # The whole job is sent in chunks, not a write per command or raster line
+    job_size = len(CommandBuilder().invalidate(64).print_job(pages, LabelMakerConfig()).build())
+    # Status query on connecting, the job, and initializing on closing
+    assert connection.write_count == 1 + -(-job_size // DEFAULT_CHUNK_SIZE) + 1
+
+    printed = device.emulator.pages
+    assert [bytes(page.data) for page in printed] == [bytes(page) for page in pages]
+    assert [page.feed for page in printed] == [False, False, True]
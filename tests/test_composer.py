@@ -0,0 +1,83 @@
+import logging
+import os.path as path
+import random
+
+import pytest
+
+from composer import INVERTED_TYPES, LabelComposer
+from margins import Margins
+from printables import PRINTABLE_MODULES, get_printable_class
+from printables.barcode import Barcode, BarcodeData
+from printables.image import Image, ImageData
+from printables.spacing import Spacing, SpacingData
+from printables.text import Text, TextData
+
+TESTDATA = path.join(path.dirname(__file__), '..', 'testdata')
+
+WORDS = ['a', 'Label', 'tape', 'W', '42', 'cube']
+
+
+def random_margins(rng: random.Random) -> Margins:
+    return Margins(rng.randint(-3, 3), rng.randint(0, 8), rng.randint(0, 8), rng.choice([1, 0.5, 0.75]))
+
+
+def random_item(rng: random.Random):
+    kind = rng.randrange(3)
+    if kind == 0:
+        return Text(TextData(rng.choice(WORDS), margins=random_margins(rng)))
+    if kind == 1:
+        return Barcode(BarcodeData(random_margins(rng), text=str(rng.randrange(10 ** 12)).zfill(12)))
+    return Spacing(SpacingData(rng.randint(0, 20)))
+
+
+def random_edit(rng: random.Random, items):
+    """ Insert, remove, move or change an item in place, like the editor does """
+    edit = rng.randrange(5) if len(items) > 0 else 0
+    if edit == 0:
+        items.insert(rng.randint(0, len(items)), random_item(rng))
+    elif edit == 1:
+        items.pop(rng.randrange(len(items)))
+    elif edit == 2:
+        items.insert(rng.randint(0, len(items) - 1), items.pop(rng.randrange(len(items))))
+    else:
+        item = rng.choice(items)
+        if edit == 3 and isinstance(item, Text):
+            item.data.text = rng.choice(WORDS)
+        elif edit == 3 and isinstance(item, Spacing):
+            item.data.width = rng.randint(0, 20)
+        else:
+            item.data.margins = random_margins(rng)
+
+
+@pytest.mark.parametrize('invert', [False, True])
+@pytest.mark.parametrize('seed', range(4))
+def test_incremental_compose_matches_full(app, seed, invert):
+    rng = random.Random(seed)
+    items = [random_item(rng) for _ in range(4)]
+    incremental = LabelComposer(invert)
+    for _ in range(40):
+        random_edit(rng, items)
+        image = incremental.compose(items)
+        full = LabelComposer(invert).compose(items)
+        assert (image.width(), image.height()) == (full.width(), full.height())
+        assert image == full
+        left, right = incremental.dirty
+        assert 0 <= left <= right <= image.width()
+
+
+@pytest.mark.parametrize('type_name', INVERTED_TYPES)
+def test_inverted_types_are_inverted(app, type_name):
+    assert type_name in PRINTABLE_MODULES
+    if type_name == 'Image':
+        item = Image(ImageData(path.join(TESTDATA, 'whodat3.png')))
+    else:
+        item = get_printable_class(type_name)()
+    assert LabelComposer(True).compose([item]) != LabelComposer(False).compose([item])
+
+
+def test_render_errors_are_logged(app, tmp_path, caplog):
+    items = [Spacing(SpacingData(5)), Image(ImageData(str(tmp_path / 'missing.png')))]
+    with caplog.at_level(logging.WARNING, logger='composer'):
+        image = LabelComposer().compose(items)
+    assert image.width() == 5
+    assert any('Image' in record.getMessage() for record in caplog.records)
@@ -0,0 +1,87 @@
+import random
+
+import packbits
+import pytest
+
+from labelmaker import compression
+from labelmaker.compression import MAX_PACKET_LENGTH
+
+
+def encode_per_line(data: bytes, line_size: int) -> bytes:
+    return b''.join(packbits.encode(data[i:i + line_size]) for i in range(0, len(data), line_size))
+
+
+def random_lines(rng: random.Random, line_count: int, line_size: int) -> bytes:
+    """ Lines mixing runs and literals of random lengths, with few distinct byte values so runs are common """
+    data = bytearray()
+    while len(data) < line_count * line_size:
+        value = rng.choice([0x00, 0xff, rng.randrange(256)])
+        data += bytes([value]) * rng.choice([1, 1, 2, 3, rng.randrange(1, 2 * MAX_PACKET_LENGTH)])
+    return bytes(data[:line_count * line_size])
+
+
+def test_encode_lines_matches_packbits_randomized():
+    rng = random.Random(1234)
+    for _ in range(200):
+        line_size = rng.choice([1, 2, 3, 16, MAX_PACKET_LENGTH])
+        data = random_lines(rng, rng.randrange(0, 20), line_size)
+        out, offsets, lengths = compression.encode_lines(data, line_size)
+        assert bytes(out) == encode_per_line(data, line_size)
+        for i, (offset, length) in enumerate(zip(offsets, lengths)):
+            line = bytes(out[offset:offset + length])
+            assert compression.decode(line) == data[i * line_size:(i + 1) * line_size]
+
+
+def test_encode_lines_reserve():
+    data = random_lines(random.Random(5), 10, 16)
+    out, offsets, lengths = compression.encode_lines(data, 16, reserve=3)
+    for i, (offset, length) in enumerate(zip(offsets, lengths)):
+        assert bytes(out[offset + 3:offset + 3 + length]) == packbits.encode(data[i * 16:(i + 1) * 16])
+
+
+def test_encode_lines_empty():
+    out, offsets, lengths = compression.encode_lines(b'', 16)
+    assert len(out) == len(offsets) == len(lengths) == 0
+
+
+@pytest.mark.parametrize('data', [
+    b'\x2a',
+    b'\x00' * MAX_PACKET_LENGTH,
+    bytes(range(MAX_PACKET_LENGTH)),
+    # A run ending on the last byte of the line, and a literal ending on it
+    b'\x01\x02' + b'\x03' * (MAX_PACKET_LENGTH - 2),
+    b'\x03' * (MAX_PACKET_LENGTH - 2) + b'\x01\x02',
+    # Literals and runs of two bytes alternating
+    b'\x01\x01\x02\x03\x03\x04' * 21 + b'\x05',
+])
+def test_encode_lines_boundaries(data):
+    out, _, _ = compression.encode_lines(data, len(data))
+    assert bytes(out) == packbits.encode(data)
+    assert compression.decode(out) == data
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'\x2a',
+    b'\x00' * 128,
+    b'\x00' * 129,
+    bytes(range(128)),
+    bytes(range(129)),
+    b'\x07' * 129 + bytes(range(129)) + b'\x07' * 128,
+])
+def test_decode_round_trip(data):
+    assert compression.decode(compression.encode(data)) == data
+
+
+def test_decode_randomized():
+    rng = random.Random(99)
+    for _ in range(200):
+        data = random_lines(rng, 1, rng.randrange(0, 600))
+        assert compression.decode(packbits.encode(data)) == data
+
+
+def test_encode_lines_rejects_bad_sizes():
+    with pytest.raises(ValueError):
+        compression.encode_lines(b'\x00' * 256, MAX_PACKET_LENGTH + 1)
+    with pytest.raises(ValueError):
+        compression.encode_lines(b'\x00' * 17, 16)
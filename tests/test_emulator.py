@@ -0,0 +1,31 @@
+from labelmaker.commands import CommandBuilder
+from labelmaker.emulator import PrinterEmulator
+from labelmaker.errors import Error2
+from labelmaker.format import Page
+from labelmaker.status import STATUS_OFFSET_ERROR_INFO_2
+
+
+def media_format(page: int) -> bytes:
+    command = bytearray(CommandBuilder().set_media_format(10, page=Page.STARTING).build())
+    # n9, the page, is the last but one parameter byte
+    command[-2] = page
+    return bytes(command)
+
+
+def test_media_format_page():
+    emulator = PrinterEmulator()
+    emulator.write(media_format(Page.LAST))
+    assert emulator.page == Page.LAST
+    assert emulator.line_count == 10
+    assert emulator.error2 == Error2.ERROR2_NONE
+
+
+def test_media_format_bad_page():
+    emulator = PrinterEmulator()
+    # Reported in the status instead of raised
+    emulator.write(media_format(7) + CommandBuilder().query_status().build())
+    assert emulator.error2 == Error2.ERROR2_TRANS_ERROR
+    status = emulator.read(32)
+    assert status[STATUS_OFFSET_ERROR_INFO_2] == Error2.ERROR2_TRANS_ERROR.value
+    # The rest of the stream is still parsed
+    assert len(emulator.pending) == 0
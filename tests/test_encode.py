@@ -0,0 +1,51 @@
+import random
+
+from labelmaker.encode import encode_raster_transfer, decode_raster_transfer, iter_raster_transfer, \
+    RASTER_LINE_SIZE, RASTER_BLOCK_LINES, TRANSFER_COMMAND, ZERO_COMMAND
+
+
+def sparse_raster(rng: random.Random, line_count: int) -> bytes:
+    """ Raster lines of which about half are blank """
+    data = bytearray()
+    for _ in range(line_count):
+        if rng.random() < 0.5:
+            data += bytes(RASTER_LINE_SIZE)
+        else:
+            data += bytes(rng.choice([0x00, 0xff, rng.randrange(256)]) for _ in range(RASTER_LINE_SIZE))
+    return bytes(data)
+
+
+def test_zero_lines_round_trip():
+    rng = random.Random(4)
+    # More than one block, with a partial last block
+    data = sparse_raster(rng, RASTER_BLOCK_LINES * 2 + 17)
+    blank = [data[i:i + RASTER_LINE_SIZE] == bytes(RASTER_LINE_SIZE) for i in range(0, len(data), RASTER_LINE_SIZE)]
+
+    frames = list(iter_raster_transfer(data, zero_lines=True))
+    assert len(frames) == len(blank)
+    for frame, is_blank in zip(frames, blank):
+        if is_blank:
+            assert bytes(frame) == bytes([ZERO_COMMAND])
+        else:
+            assert frame[0] == TRANSFER_COMMAND
+
+    assert decode_raster_transfer(encode_raster_transfer(data, zero_lines=True)) == data
+
+
+def test_zero_lines_only_blank():
+    data = bytes(RASTER_LINE_SIZE * 10)
+    encoded = encode_raster_transfer(data, zero_lines=True)
+    assert encoded == bytes([ZERO_COMMAND]) * 10
+    assert decode_raster_transfer(encoded) == data
+
+
+def test_without_zero_lines():
+    data = sparse_raster(random.Random(8), 50)
+    encoded = encode_raster_transfer(data, zero_lines=False)
+    assert ZERO_COMMAND not in [bytes(frame)[0] for frame in iter_raster_transfer(data, zero_lines=False)]
+    assert decode_raster_transfer(encoded) == data
+
+
+def test_partial_line():
+    data = sparse_raster(random.Random(3), 3) + b'\x00\x01\x02'
+    assert decode_raster_transfer(encode_raster_transfer(data)) == data
@@ -0,0 +1,90 @@
+import os.path as path
+
+import numpy as np
+import pytest
+
+import dither
+from labelmaker import USABLE_HEIGHT
+from printables.image import Image, ImageData
+
+TESTDATA = path.join(path.dirname(__file__), '..', 'testdata')
+
+
+def test_render(app):
+    image = Image(ImageData(path.join(TESTDATA, 'whodat3.png')))
+    render = image.render()
+    assert image.get_render_error() is None
+    assert render.height() == USABLE_HEIGHT and render.width() > 0
+
+
+def test_render_unreadable_file(app, tmp_path):
+    bad = tmp_path / 'bad.png'
+    bad.write_bytes(b'not a png')
+    image = Image(ImageData(str(bad)))
+    render = image.render()
+    assert isinstance(image.get_render_error(), OSError)
+    assert render.width() == 0
+
+
+def test_render_missing_file(app, tmp_path):
+    image = Image(ImageData(str(tmp_path / 'missing.png')))
+    assert image.render().width() == 0
+    assert isinstance(image.get_render_error(), FileNotFoundError)
+
+
+def test_load_larger_than_cache(app, monkeypatch):
+    from printables import image
+    monkeypatch.setattr(image.source_cache, 'max_bytes', 16)
+    monkeypatch.setattr(image.thumbnail_cache, 'max_bytes', 16)
+    file_name = path.join(TESTDATA, 'whodat3.png')
+    assert image.load_source(file_name).height() == USABLE_HEIGHT
+    assert not image.load_thumbnail(file_name).isNull()
+
+
+def test_load_counts_one_miss(app):
+    from printables import image
+    file_name = path.join(TESTDATA, 'whodat3.png')
+    image.source_cache.clear()
+    hits, misses = image.source_cache.hits, image.source_cache.misses
+    image.load_source(file_name)
+    image.load_source(file_name)
+    assert (image.source_cache.hits - hits, image.source_cache.misses - misses) == (1, 1)
+
+
+def reference_diffusion(values, kernel, level=127):
+    """ Plain sequential error diffusion, one pixel at a time """
+    height, width = values.shape
+    work = [[float(v) for v in row] for row in values]
+    white = [[False] * width for _ in range(height)]
+    for y in range(height):
+        for x in range(width):
+            white[y][x] = work[y][x] > level
+            error = work[y][x] - (255 if white[y][x] else 0)
+            for dy, dx, weight in kernel:
+                if y + dy < height and 0 <= x + dx < width:
+                    work[y + dy][x + dx] += weight * error
+    return np.array(white, dtype=bool)
+
+
+def reference_bayer(values, level=127):
+    n = dither.BAYER_8X8.shape[0]
+    height, width = values.shape
+    return np.array([[values[y, x] > level + (dither.BAYER_8X8[y % n, x % n] + 0.5) / n ** 2 * 255 - 127.5
+                      for x in range(width)] for y in range(height)], dtype=bool)
+
+
+REFERENCES = {
+    'threshold': lambda values: values > 127,
+    'floyd-steinberg': lambda values: reference_diffusion(values, dither.FLOYD_STEINBERG),
+    'atkinson': lambda values: reference_diffusion(values, dither.ATKINSON),
+    'bayer': reference_bayer,
+}
+
+
+@pytest.mark.parametrize('method', sorted(dither.METHODS))
+@pytest.mark.parametrize('shape', [(1, 1), (1, 17), (13, 1), (9, 23), (20, 5)])
+def test_dither_matches_reference(method, shape):
+    # Integer values keep all diffused errors exact, so results must match pixel for pixel
+    values = np.random.default_rng(sum(shape)).integers(0, 256, shape).astype(np.float32)
+    _, function = dither.METHODS[method]
+    assert np.array_equal(function(values), REFERENCES[method](values))
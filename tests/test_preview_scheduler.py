@@ -0,0 +1,102 @@
+import pickle
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from PyQt6.QtCore import QObject
+
+from gui.preview_scheduler import DEBOUNCE_MS, PreviewScheduler
+from printables.text import Text, TextData
+
+
+class RecordingText(Text):
+    """ Text that records what the worker thread renders, and can be held up in the middle of a render """
+    rendered = []
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def render(self):
+        RecordingText.rendered.append(self.data.text)
+        RecordingText.started.set()
+        RecordingText.proceed.wait(5)
+        return super().render()
+
+
+class FakeEditor(QObject):
+
+    def __init__(self, items):
+        super().__init__()
+        self.sources = SimpleNamespace(items=SimpleNamespace(items=items))
+        self.previews = 0
+
+    def update_preview(self):
+        for item in self.sources.items.items:
+            item.render_cached()
+        self.previews += 1
+
+
+def process_until(app, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Timed out waiting for the preview'
+        app.processEvents()
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def scheduler(app):
+    RecordingText.rendered = []
+    RecordingText.started.clear()
+    RecordingText.proceed.set()
+    item = RecordingText(TextData('a'))
+    editor = FakeEditor([item])
+    scheduler = PreviewScheduler(editor)
+    yield scheduler, editor, item
+    RecordingText.proceed.set()
+    scheduler.stop()
+
+
+def test_bursts_are_debounced(app, scheduler):
+    scheduler, editor, item = scheduler
+    for text in ['ab', 'abc', 'abcd']:
+        item.data.text = text
+        scheduler.schedule()
+    process_until(app, lambda: editor.previews > 0)
+    # Let anything else that was (wrongly) queued arrive
+    time.sleep(3 * DEBOUNCE_MS / 1000)
+    app.processEvents()
+
+    assert RecordingText.rendered == ['abcd']
+    assert editor.previews == 1
+    assert item.is_render_cached()
+
+
+def test_only_the_last_generation_is_applied(app, scheduler):
+    scheduler, editor, item = scheduler
+    RecordingText.proceed.clear()
+    scheduler.schedule()
+    process_until(app, RecordingText.started.is_set)
+
+    # Edit while the worker renders the old snapshot, which must not be used for the new content
+    item.data.text = 'b'
+    scheduler.schedule()
+    RecordingText.proceed.set()
+    process_until(app, lambda: editor.previews > 0)
+    time.sleep(3 * DEBOUNCE_MS / 1000)
+    app.processEvents()
+
+    assert RecordingText.rendered == ['a', 'b']
+    assert editor.previews == 1
+    key, image, _ = item._render_cache
+    assert key == item.get_content_key()
+    assert image.width() == Text(TextData('b', font_string=item.data.font_string)).render().width()
+
+
+def test_render_cache_is_not_pickled(app):
+    item = Text(TextData('pickled'))
+    item.render_cached()
+    restored = pickle.loads(pickle.dumps(item))
+    assert '_render_cache' not in vars(restored)
+    assert not restored.is_render_cached()
+    assert restored.data.text == 'pickled'
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+from cli.batch import render_record
+from cli.render_pool import RenderPool
+from composer import LabelComposer
+from printables.text import Text, TextData
+
+SHM_DIR = '/dev/shm'
+
+
+def blocks(prefix: str):
+    return [name for name in os.listdir(SHM_DIR) if name.startswith(prefix)]
+
+
+@pytest.fixture
+def template(app):
+    return [Text(TextData('{name}'))]
+
+
+def test_render_matches_in_process(template):
+    records = [{'name': f'Label {i}'} for i in range(10)] + [{}]
+    composer = LabelComposer()
+    with RenderPool(template, 1, chunk_size=4) as pool:
+        results = list(pool.render(records))
+    assert [index for index, _, _, _ in results] == list(range(1, 12))
+    for index, record, image, error in results[:-1]:
+        assert error is None
+        assert image == render_record(template, composer, record, index)
+    assert results[-1][3] is not None
+
+
+@pytest.mark.skipif(not os.path.isdir(SHM_DIR) or sys.platform == 'darwin', reason='needs /dev/shm')
+def test_close_frees_unread_blocks(template):
+    records = [{'name': f'Label {i}'} for i in range(40)]
+    pool = RenderPool(template, 1, chunk_size=4)
+    try:
+        results = pool.render(records)
+        next(results)
+        # Let the worker get ahead of the reader
+        pool.pool.apply(os.getpid)
+    finally:
+        pool.close()
+    assert blocks(pool.block_prefix) == []
+    results.close()
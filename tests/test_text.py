@@ -0,0 +1,19 @@
+import text_layout
+from printables.text import TextData, TextPropsEdit
+
+
+def test_adjusted_size_fits_every_line(app):
+    font = TextData().getQFont()
+    single = TextPropsEdit.calc_adjusted_size_for_font(font, 20, 'Ag')
+    assert TextPropsEdit.calc_adjusted_size_for_font(font, 20, 'Ag\nAg') == single
+    assert TextPropsEdit.calc_adjusted_size_for_font(font, 20, 'Ag\nx') == single
+    assert TextPropsEdit.calc_adjusted_size_for_font(font, 20, 'x\nAg') == single
+
+
+def test_adjusted_size_scales_with_line_sizes(app):
+    font = TextData().getQFont()
+    adjusted = TextPropsEdit.calc_adjusted_size_for_font(font, 20, 'Ag\nAg', (1, 0.5))
+    assert adjusted >= TextPropsEdit.calc_adjusted_size_for_font(font, 20, 'Ag')
+    # The half size line is measured against half the height
+    font.setPixelSize(adjusted)
+    assert text_layout.bounding_rect(font.toString(), 'Ag', round(adjusted * 0.5))[3] <= 10
@@ -0,0 +1,45 @@
+import threading
+
+import text_layout
+from labelmaker import USABLE_HEIGHT
+from printables.text import TextData
+
+
+def in_thread(fun):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fun()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_fonts_are_per_thread(app):
+    font_string = TextData().font_string
+    font = text_layout.get_font(font_string)
+    assert text_layout._font(font_string, 0) is text_layout._font(font_string, 0)
+    assert in_thread(lambda: text_layout._font(font_string, 0)) is not text_layout._font(font_string, 0)
+    assert in_thread(lambda: text_layout.get_font(font_string)) == font
+
+
+def test_render_in_thread_matches(app):
+    font_string = TextData().font_string
+    text_layout.clear_caches()
+    image = in_thread(lambda: text_layout.paint_line(font_string, 'Thread 42'))
+    assert image == text_layout.paint_line(font_string, 'Thread 42')
+
+
+def test_clear_caches(app):
+    font_string = TextData().font_string
+    text_layout.render_line(font_string, 'cached')
+    text_layout.clear_caches()
+    assert text_layout.raster_cache.size == 0
+    assert text_layout.horizontal_advance.cache_info().currsize == 0
+
+
+def test_lines_fit_label(app):
+    font_string = TextData().font_string
+    lines = ('Jane Doe', 'Room 4.12', 'A-000123')
+    sizes = text_layout.pack_lines(font_string, lines, (2.0, 1.0, 1.0))
+    assert sum(text_layout.font_metrics(font_string, size).height for size in sizes) <= USABLE_HEIGHT
+    image = text_layout.render_text(font_string, '\n'.join(lines), ('center',), (2, 1, 1))
+    assert image.height() == USABLE_HEIGHT and image.width() > 0
@@ -0,0 +1,302 @@
+"""
+Shaping, measuring and rasterizing of text, with caches
+
+Fonts are given by their font string (QFont.toString), optionally with a
+different pixel size. Measurements are memoized by font string, pixel size
+and text. Parsed fonts and shaped QTextLayouts are kept per thread, as QFont
+is not safe to share between threads and Qt font engines belong to the
+thread that created them. Rendered lines are kept in an ImageCache, so
+repeated labels and batches that share fonts skip the shaping and painting.
+
+Text with line breaks is laid out as a block of lines, each with its own
+alignment and a size relative to the others, packed into the label height.
+Lines are shaped by font, pixel size and text, so changing the alignment or
+the other lines does not shape a line again.
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Generic, Hashable, NamedTuple, Sequence, Tuple, TypeVar
+
+from PyQt6.QtCore import QPointF
+from PyQt6.QtGui import QFont, QFontInfo, QFontMetrics, QImage, QPainter, QTextLayout
+
+from image_cache import ImageCache
+from labelmaker import USABLE_HEIGHT
+
+FONT_CACHE_SIZE = 256
+METRICS_CACHE_SIZE = 8192
+# Shaped layouts per thread
+LAYOUT_CACHE_SIZE = 512
+
+# Largest pixel size fit_pixel_size considers, fonts with small glyphs need more than the label height
+MAX_FIT_SIZE = USABLE_HEIGHT * 4
+
+# Horizontal alignments of the lines of multi-line text
+ALIGN_LEFT = 'left'
+ALIGN_CENTER = 'center'
+ALIGN_RIGHT = 'right'
+ALIGNMENTS = [ALIGN_LEFT, ALIGN_CENTER, ALIGN_RIGHT]
+
+# Rendered lines by font string, text, pixel size and placement
+raster_cache = ImageCache(16 << 20)
+
+
+T = TypeVar('T')
+
+
+class ThreadCache(threading.local, Generic[T]):
+    """ Least recently used cache of Qt objects that must not be shared between threads, one cache per thread """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[Hashable, T]' = OrderedDict()
+
+    def get_or_create(self, key: Hashable, create: Callable[[], T]) -> T:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+
+        entry = create()
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+
+
+class FontMetrics(NamedTuple):
+    ascent: int
+    descent: int
+    height: int
+    cap_height: int
+
+
+def _parse_font(font_string: str, pixel_size: int) -> QFont:
+    font = QFont()
+    font.fromString(font_string)
+    if pixel_size > 0:
+        font.setPixelSize(pixel_size)
+    return font
+
+
+font_cache: ThreadCache[QFont] = ThreadCache(FONT_CACHE_SIZE)
+
+
+def _font(font_string: str, pixel_size: int) -> QFont:
+    """ The parsed font of the calling thread, it must not be modified or handed to another thread """
+    return font_cache.get_or_create((font_string, pixel_size), lambda: _parse_font(font_string, pixel_size))
+
+
+def get_font(font_string: str, pixel_size: int = 0) -> QFont:
+    """ The font described by `font_string`, with `pixel_size` if it is given """
+    # A copy, the cached font is shared
+    return QFont(_font(font_string, pixel_size))
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def font_metrics(font_string: str, pixel_size: int = 0) -> FontMetrics:
+    metrics = QFontMetrics(_font(font_string, pixel_size))
+    return FontMetrics(metrics.ascent(), metrics.descent(), metrics.height(), metrics.capHeight())
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def pixel_size_of(font_string: str) -> int:
+    """ The pixel size of the font, also for fonts that are given in points """
+    return QFontInfo(_font(font_string, 0)).pixelSize()
+
+
+@lru_cache(maxsize=METRICS_CACHE_SIZE)
+def bounding_rect(font_string: str, text: str, pixel_size: int = 0) -> Tuple[int, int, int, int]:
+    """ The ink bounds of `text` as (left, top, width, height), relative to the baseline """
+    rect = QFontMetrics(_font(font_string, pixel_size)).boundingRect(text)
+    return rect.left(), rect.top(), rect.width(), rect.height()
+
+
+@lru_cache(maxsize=METRICS_CACHE_SIZE)
+def horizontal_advance(font_string: str, text: str, pixel_size: int = 0) -> int:
+    return QFontMetrics(_font(font_string, pixel_size)).horizontalAdvance(text)
+
+
+def _layout_line(font_string: str, text: str, pixel_size: int) -> QTextLayout:
+    layout = QTextLayout(text, _font(font_string, pixel_size))
+    layout.setCacheEnabled(True)
+    layout.beginLayout()
+    line = layout.createLine()
+    if line.isValid():
+        # Wide enough to never wrap
+        line.setLineWidth(1e9)
+    layout.endLayout()
+    return layout
+
+
+# Shaped single lines
+layout_cache: ThreadCache[QTextLayout] = ThreadCache(LAYOUT_CACHE_SIZE)
+
+
+def shape_line(font_string: str, text: str, pixel_size: int = 0) -> QTextLayout:
+    return layout_cache.get_or_create((font_string, pixel_size, text),
+                                      lambda: _layout_line(font_string, text, pixel_size))
+
+
+@lru_cache(maxsize=METRICS_CACHE_SIZE)
+def fit_pixel_size(font_string: str, text: str, max_height: int = USABLE_HEIGHT, max_width: int = 0) -> int:
+    """ The largest pixel size at which the ink of `text` is at most `max_height` high, and its advance at most
+    `max_width` wide if that is given
+
+    Bisects over the memoized metrics, which grow with the pixel size, so only about log2(MAX_FIT_SIZE) sizes are
+    measured and nothing is rendered. Text without ink gets `max_height`.
+    """
+    if text.strip() == '':
+        return max_height
+
+    def fits(pixel_size: int) -> bool:
+        if bounding_rect(font_string, text, pixel_size)[3] > max_height:
+            return False
+        return max_width <= 0 or horizontal_advance(font_string, text, pixel_size) <= max_width
+
+    low, high = 1, MAX_FIT_SIZE
+    if fits(high):
+        return high
+    # fits(low) is assumed, smaller sizes are not possible anyway
+    while high - low > 1:
+        middle = (low + high) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def paint_line(font_string: str, text: str, pixel_size: int = 0, center_ink: bool = False) -> QImage:
+    """ Rasterize `text` on a label high image as wide as its advance
+
+    The top of the font is at the top of the image, or with `center_ink` the ink is centered vertically.
+    """
+    width = horizontal_advance(font_string, text, pixel_size)
+    image = QImage(width, USABLE_HEIGHT, QImage.Format.Format_Mono)
+    image.fill(0xffffffff)
+    if width == 0:
+        return image
+    layout = shape_line(font_string, text, pixel_size)
+    line = layout.lineAt(0)
+    y = 0
+    if center_ink:
+        _, top, _, height = bounding_rect(font_string, text, pixel_size)
+        # The baseline is line.ascent() below the top of the line, the ink starts `top` from the baseline
+        y = (USABLE_HEIGHT - height) // 2 - top - line.ascent()
+    with QPainter(image) as painter:
+        # Horizontally centered the same way QPainter.drawText centers in a rectangle
+        layout.draw(painter, QPointF((width - line.horizontalAdvance()) / 2, y))
+    return image
+
+
+def render_line(font_string: str, text: str, pixel_size: int = 0, center_ink: bool = False) -> QImage:
+    return raster_cache.get_or_create((font_string, text, pixel_size, center_ink),
+                                      lambda: paint_line(font_string, text, pixel_size, center_ink))
+
+
+def render_fitted(font_string: str, text: str, max_width: int = 0) -> QImage:
+    """ Render `text` as large as its ink fits the label height (and `max_width`), vertically centered """
+    pixel_size = fit_pixel_size(font_string, text, USABLE_HEIGHT, max_width)
+    return render_line(font_string, text, pixel_size, center_ink=True)
+
+
+def split_lines(text: str, aligns: Sequence[str] = (), sizes: Sequence[float] = ()) \
+        -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[float, ...]]:
+    """ The lines of `text` with the alignment and relative size of each
+
+    Lines past the end of `aligns` get the last alignment (left if there is none), lines past the end of `sizes`
+    get size 1.
+    """
+    lines = tuple(text.split('\n'))
+    line_aligns = tuple(aligns[min(i, len(aligns) - 1)] if len(aligns) > 0 else ALIGN_LEFT for i in range(len(lines)))
+    line_sizes = tuple(float(sizes[i]) if i < len(sizes) and sizes[i] > 0 else 1.0 for i in range(len(lines)))
+    return lines, line_aligns, line_sizes
+
+
+@lru_cache(maxsize=METRICS_CACHE_SIZE)
+def pack_lines(font_string: str, lines: Tuple[str, ...], sizes: Tuple[float, ...], fit: bool = False,
+               max_width: int = 0) -> Tuple[int, ...]:
+    """ The pixel sizes of `lines`, in proportion to their relative `sizes`, such that the lines stacked on top of
+    each other fit the label height, and every line is at most `max_width` wide if that is given
+
+    Size 1 is the size of the font, or with `fit` as large as fits. Bisects over the memoized metrics like
+    fit_pixel_size.
+    """
+    def pixel_sizes(base: int) -> Tuple[int, ...]:
+        return tuple(max(1, round(base * size)) for size in sizes)
+
+    def fits(base: int) -> bool:
+        line_sizes = pixel_sizes(base)
+        if sum(font_metrics(font_string, pixel_size).height for pixel_size in line_sizes) > USABLE_HEIGHT:
+            return False
+        return max_width <= 0 or all(horizontal_advance(font_string, line, pixel_size) <= max_width
+                                     for line, pixel_size in zip(lines, line_sizes))
+
+    low, high = 1, MAX_FIT_SIZE if fit else pixel_size_of(font_string)
+    if fits(high):
+        return pixel_sizes(high)
+    while high - low > 1:
+        middle = (low + high) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle
+    return pixel_sizes(low)
+
+
+def paint_lines(font_string: str, lines: Tuple[str, ...], aligns: Tuple[str, ...],
+                pixel_sizes: Tuple[int, ...]) -> QImage:
+    """ Rasterize `lines` below each other, vertically centered on a label high image as wide as the widest line """
+    advances = [horizontal_advance(font_string, line, size) for line, size in zip(lines, pixel_sizes)]
+    heights = [font_metrics(font_string, size).height for size in pixel_sizes]
+    width = max(advances)
+    image = QImage(width, USABLE_HEIGHT, QImage.Format.Format_Mono)
+    image.fill(0xffffffff)
+    if width == 0:
+        return image
+
+    y = (USABLE_HEIGHT - sum(heights)) // 2
+    with QPainter(image) as painter:
+        for line, align, size, advance, height in zip(lines, aligns, pixel_sizes, advances, heights):
+            if advance > 0:
+                if align == ALIGN_RIGHT:
+                    x = width - advance
+                elif align == ALIGN_CENTER:
+                    x = (width - advance) // 2
+                else:
+                    x = 0
+                layout = shape_line(font_string, line, size)
+                layout.draw(painter, QPointF(x + (advance - layout.lineAt(0).horizontalAdvance()) / 2, y))
+            y += height
+    return image
+
+
+def render_text(font_string: str, text: str, aligns: Sequence[str] = (), sizes: Sequence[float] = (),
+                fit: bool = False, max_width: int = 0) -> QImage:
+    """ Render `text` as a single line, or as a block of lines if it has line breaks, see split_lines and pack_lines
+
+    A single line is rendered at the font size, or with `fit` as large as fits like render_fitted.
+    """
+    if '\n' not in text:
+        if fit:
+            return render_fitted(font_string, text, max_width)
+        return render_line(font_string, text)
+
+    lines, line_aligns, line_sizes = split_lines(text, aligns, sizes)
+    pixel_sizes = pack_lines(font_string, lines, line_sizes, fit, max_width)
+    return raster_cache.get_or_create((font_string, lines, line_aligns, pixel_sizes),
+                                      lambda: paint_lines(font_string, lines, line_aligns, pixel_sizes))
+
+
+def clear_caches():
+    """ Forget all fonts, measurements, layouts and rendered text (the fonts and layouts of the calling thread only) """
+    for memo in (pixel_size_of, font_metrics, bounding_rect, horizontal_advance, fit_pixel_size, pack_lines):
+        memo.cache_clear()
+    font_cache.clear()
+    layout_cache.clear()
+    raster_cache.clear()